@@ -0,0 +1,24 @@
+from typing import Any, Dict, Optional
+
+
+class Ability:
+    """A tool the agent can call.
+
+    Subclasses set ``name``, ``description`` and a JSON schema in ``parameters``,
+    and implement ``handle_request``. They are discovered by the ability registry
+    and only instantiated the first time the model calls them, so constructors
+    should stay cheap and take no required arguments.
+    """
+
+    name: str = ""
+    description: str = ""
+    parameters: Dict[str, Any] = {"type": "object", "properties": {}}
+    # None uses ABILITY_TIMEOUT_SECONDS / ABILITY_MAX_CONCURRENCY
+    timeout: Optional[float] = None
+    max_concurrency: Optional[int] = None
+
+    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        """Release resources held by the ability."""
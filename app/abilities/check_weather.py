@@ -1,23 +1,55 @@
+import logging
 import os
 from typing import Dict, Any, Optional
 
-import requests
-from agents.mcp import MCPServer
+import httpx
 
-# Get API key from environment variables
-OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
+from ..services.weather_cache import geocode_cache, weather_cache
+from .base import Ability
+from ..utils.circuit_breaker import CircuitBreaker, get_breaker
+from ..utils.http import request_with_retry
 
+logger = logging.getLogger(__name__)
 
-class CheckWeatherServer(MCPServer):
-    """MCP server for checking weather information using OpenWeather One Call API 3.0."""
+# Get API key from environment variables
+OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "")
+# Overridable so the ability can be pointed at a local stub server
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org")
+
+# Client errors that mean the endpoint is unusable for us (no subscription, bad key,
+# over quota) rather than that one request was wrong, so they count against the breaker
+UNAVAILABLE_STATUSES = (401, 403, 429)
+
+
+class CheckWeatherServer(Ability):
+    """Ability for checking weather information using OpenWeather One Call API 3.0."""
+
+    name = "check_weather"
+    description = (
+        "Get current weather and forecast for a location. "
+        "Pass a location name (e.g. \"Berlin,DE\") or lat/lon coordinates."
+    )
+    parameters = {
+        "type": "object",
+        "properties": {
+            "location": {"type": "string", "description": "City name, optionally with country code"},
+            "lat": {"type": "number", "description": "Latitude"},
+            "lon": {"type": "number", "description": "Longitude"},
+            "exclude": {"type": "string", "description": "Comma-separated One Call parts to exclude"},
+            "units": {"type": "string", "enum": ["standard", "metric", "imperial"]},
+            "lang": {"type": "string", "description": "Language code for descriptions"}
+        }
+    }
 
-    def __init__(self):
-        super().__init__("check_weather")
-        self.api_key = OPENWEATHER_API_KEY
-        self.base_url = "https://api.openweathermap.org/data/3.0/onecall"
-        self.geocoding_url = "https://api.openweathermap.org/geo/1.0/direct"
+    def __init__(self, api_key: Optional[str] = None, host: str = OPENWEATHER_BASE_URL):
+        self.api_key = OPENWEATHER_API_KEY if api_key is None else api_key
+        self.base_url = f"{host}/data/3.0/onecall"
+        self.geocoding_url = f"{host}/geo/1.0/direct"
         # Fallback to 2.5 API if 3.0 is not available
-        self.fallback_url = "https://api.openweathermap.org/data/2.5/weather"
+        self.fallback_url = f"{host}/data/2.5/weather"
+        # Breakers are shared per endpoint, so every instance routes the same way
+        self.onecall_breaker = get_breaker("openweather.onecall_3_0")
+        self.fallback_breaker = get_breaker("openweather.weather_2_5")
 
     async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Handle the weather check request."""
@@ -39,7 +71,7 @@ class CheckWeatherServer(MCPServer):
                     }
 
                 # Get coordinates from location name
-                coords = self._get_coordinates(location)
+                coords = await self._get_coordinates(location)
                 if not coords:
                     return {
                         "success": False,
@@ -49,7 +81,7 @@ class CheckWeatherServer(MCPServer):
                 lat, lon = coords
 
             # Get weather data
-            weather_data = self._get_weather(lat, lon, exclude, units, lang)
+            weather_data = await self._get_weather(lat, lon, exclude, units, lang)
 
             if not weather_data:
                 return {
@@ -57,9 +89,9 @@ class CheckWeatherServer(MCPServer):
                     "error": f"Failed to get weather data for coordinates: {lat}, {lon}"
                 }
 
-            # Add location name to the response if provided
+            # Add location name to the response if provided (on a copy; the original is cached)
             if location:
-                weather_data["location_name"] = location
+                weather_data = {**weather_data, "location_name": location}
 
             return {
                 "success": True,
@@ -72,7 +104,11 @@ class CheckWeatherServer(MCPServer):
                 "error": f"Error checking weather: {str(e)}"
             }
 
-    def _get_coordinates(self, location: str) -> Optional[tuple]:
+    async def _get_coordinates(self, location: str) -> Optional[tuple]:
+        """Get coordinates from location name, consulting the geocode cache first."""
+        return await geocode_cache.get_or_fetch(location, self._fetch_coordinates)
+
+    async def _fetch_coordinates(self, location: str) -> Optional[tuple]:
         """Get coordinates from location name using OpenWeather Geocoding API."""
         if not self.api_key:
             raise ValueError("OpenWeather API key is not set")
@@ -83,7 +119,7 @@ class CheckWeatherServer(MCPServer):
             "appid": self.api_key
         }
 
-        response = requests.get(self.geocoding_url, params=params)
+        response = await request_with_retry("GET", self.geocoding_url, params=params)
 
         if response.status_code == 200:
             data = response.json()
@@ -92,12 +128,19 @@ class CheckWeatherServer(MCPServer):
 
         return None
 
-    def _get_weather(self, lat: float, lon: float, exclude: str, units: str, lang: str) -> Optional[Dict[str, Any]]:
-        """Get weather data from OpenWeather One Call API 3.0."""
+    async def _get_weather(self, lat: float, lon: float, exclude: str, units: str, lang: str) -> Optional[Dict[str, Any]]:
+        """Get weather data, served from the weather cache while it is fresh."""
+        return await weather_cache.get_or_fetch(lat, lon, exclude, units, lang, self._fetch_weather)
+
+    async def _fetch_weather(self, lat: float, lon: float, exclude: str, units: str, lang: str) -> Optional[Dict[str, Any]]:
+        """Get weather data from OpenWeather One Call API 3.0, falling back to the 2.5 API.
+
+        3.0 is skipped while its circuit breaker is open, so a missing subscription
+        or an outage costs one request per probe rather than one per lookup.
+        """
         if not self.api_key:
             raise ValueError("OpenWeather API key is not set")
 
-        # Try the One Call API 3.0 first
         params = {
             "lat": lat,
             "lon": lon,
@@ -106,28 +149,39 @@ class CheckWeatherServer(MCPServer):
             "lang": lang
         }
 
-        if exclude:
-            params["exclude"] = exclude
-
-        response = requests.get(self.base_url, params=params)
+        if self.onecall_breaker.allow_request():
+            onecall_params = {**params, "exclude": exclude} if exclude else params
+            data = await self._fetch_json(self.base_url, onecall_params, self.onecall_breaker)
+            if data is not None:
+                return data
 
         # If the 3.0 API fails (e.g., subscription required), fall back to 2.5 API
-        if response.status_code != 200:
-            # Try the fallback API
-            fallback_params = {
-                "lat": lat,
-                "lon": lon,
-                "appid": self.api_key,
-                "units": units,
-                "lang": lang
-            }
-
-            fallback_response = requests.get(self.fallback_url, params=fallback_params)
+        if not self.fallback_breaker.allow_request():
+            return None
+        return await self._fetch_json(self.fallback_url, params, self.fallback_breaker)
 
-            if fallback_response.status_code == 200:
-                return fallback_response.json()
-            else:
-                # If both APIs fail, return None
+    async def _fetch_json(self, url: str, params: Dict[str, Any], breaker: CircuitBreaker) -> Optional[Dict[str, Any]]:
+        """GET an endpoint and record the outcome on its breaker; None on any failure."""
+        try:
+            response = await request_with_retry("GET", url, params=params)
+            if response.status_code != 200:
+                logger.debug("Weather request to %s returned %d", url, response.status_code)
+                if response.status_code >= 500 or response.status_code in UNAVAILABLE_STATUSES:
+                    breaker.record_failure()
+                else:
+                    # The upstream answered; the request itself was wrong
+                    breaker.record_success()
                 return None
-
-        return response.json()
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Weather request to {url} failed: {str(e)}")
+            breaker.record_failure()
+            return None
+        except BaseException:
+            # Cancelled, e.g. the client disconnected mid tool call; nothing was learned about
+            # the upstream, but a half-open breaker must not keep waiting for this probe
+            breaker.abandon_probe()
+            raise
+
+        breaker.record_success()
+        return data
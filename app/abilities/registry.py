@@ -0,0 +1,171 @@
+import asyncio
+import importlib
+import inspect
+import json
+import logging
+import pkgutil
+import time
+from typing import Any, Dict, List, Optional, Type
+
+from agents import FunctionTool, RunContextWrapper
+
+from ..config.settings import ABILITY_TIMEOUT_SECONDS, ABILITY_MAX_CONCURRENCY
+from ..utils.metrics import TOOL_CALL_DURATION
+from .base import Ability
+
+logger = logging.getLogger(__name__)
+
+# Modules in this package that are infrastructure, not abilities
+_INTERNAL_MODULES = {"base", "registry"}
+
+
+class ToolStats:
+    """Call counts and latency for one tool."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "avg_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds
+        }
+
+
+class _AbilitySlot:
+    """A discovered ability class, its instance once created, and its call limits."""
+
+    def __init__(self, ability_cls: Type[Ability]):
+        self.ability_cls = ability_cls
+        self.instance: Optional[Ability] = None
+        self.timeout = ability_cls.timeout or ABILITY_TIMEOUT_SECONDS
+        self.semaphore = asyncio.Semaphore(ability_cls.max_concurrency or ABILITY_MAX_CONCURRENCY)
+        self.stats = ToolStats()
+
+    def get_instance(self) -> Ability:
+        if self.instance is None:
+            logger.info("Loading ability %s", self.ability_cls.name)
+            self.instance = self.ability_cls()
+        return self.instance
+
+
+class AbilityRegistry:
+    """Discovers the abilities in a package and exposes them to the agent as tools.
+
+    Ability modules are imported the first time ``tools()`` is called rather than
+    at startup, and each ability is instantiated on its first call. Calls go through
+    a per-ability semaphore and timeout; the agent runner executes the tool calls of
+    one model turn concurrently.
+    """
+
+    def __init__(self, package: str = __package__):
+        self.package = package
+        self._slots: Optional[Dict[str, _AbilitySlot]] = None
+        self._tools: List[FunctionTool] = []
+
+    def _discover(self) -> Dict[str, _AbilitySlot]:
+        slots = {}
+        package = importlib.import_module(self.package)
+        for module_info in pkgutil.iter_modules(package.__path__):
+            if module_info.name.startswith("_") or module_info.name in _INTERNAL_MODULES:
+                continue
+            try:
+                module = importlib.import_module(f"{self.package}.{module_info.name}")
+            except Exception as e:
+                logger.error(f"Failed to import ability module {module_info.name}: {str(e)}")
+                continue
+            for _, obj in inspect.getmembers(module, inspect.isclass):
+                if issubclass(obj, Ability) and obj.__module__ == module.__name__ and obj.name:
+                    slots[obj.name] = _AbilitySlot(obj)
+        logger.debug("Discovered abilities: %s", sorted(slots))
+        return slots
+
+    def _load(self) -> Dict[str, _AbilitySlot]:
+        if self._slots is None:
+            self._slots = self._discover()
+            self._tools = [self._make_tool(slot) for slot in self._slots.values()]
+        return self._slots
+
+    def tools(self) -> List[FunctionTool]:
+        """Tool definitions for every discovered ability, without instantiating them."""
+        self._load()
+        return self._tools
+
+    def _make_tool(self, slot: _AbilitySlot) -> FunctionTool:
+        async def on_invoke_tool(ctx: RunContextWrapper[Any], arguments: str) -> str:
+            return await self.call(slot.ability_cls.name, arguments)
+
+        return FunctionTool(
+            name=slot.ability_cls.name,
+            description=slot.ability_cls.description,
+            params_json_schema=slot.ability_cls.parameters,
+            on_invoke_tool=on_invoke_tool,
+            strict_json_schema=False
+        )
+
+    async def call(self, name: str, arguments: str) -> str:
+        """Run one tool call and return its result as JSON for the model.
+
+        Failures and timeouts are returned as ``{"success": false, ...}`` so the
+        model can recover instead of the whole run failing.
+        """
+        slot = self._load().get(name)
+        if slot is None:
+            return json.dumps({"success": False, "error": f"Unknown tool: {name}"})
+
+        stats = slot.stats
+        outcome = "ok"
+        start = time.perf_counter()
+        stats.in_flight += 1
+        try:
+            request = json.loads(arguments) if arguments else {}
+            async with slot.semaphore:
+                result = await asyncio.wait_for(slot.get_instance().handle_request(request), timeout=slot.timeout)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            stats.timeouts += 1
+            logger.warning("Tool %s timed out after %.1fs", name, slot.timeout)
+            result = {"success": False, "error": f"{name} timed out"}
+        except Exception as e:
+            outcome = "error"
+            stats.errors += 1
+            logger.error(f"Tool {name} failed: {str(e)}")
+            result = {"success": False, "error": f"{name} failed: {str(e)}"}
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.in_flight -= 1
+            stats.record(elapsed)
+            TOOL_CALL_DURATION.observe(elapsed, (name, outcome))
+
+        return json.dumps(result, default=str)
+
+    async def aclose(self) -> None:
+        """Close the abilities that were instantiated."""
+        for slot in (self._slots or {}).values():
+            if slot.instance is not None:
+                try:
+                    await slot.instance.aclose()
+                except Exception as e:
+                    logger.error(f"Failed to close ability {slot.ability_cls.name}: {str(e)}")
+
+    def stats(self) -> dict:
+        if self._slots is None:
+            return {}
+        return {name: {"loaded": slot.instance is not None, **slot.stats.snapshot()} for name, slot in self._slots.items()}
+
+
+ability_registry = AbilityRegistry()
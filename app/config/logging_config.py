@@ -0,0 +1,206 @@
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .settings import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_DEBUG_SAMPLE_RATE
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else came from ``extra=`` and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[QueueListener] = None
+_config = (LOG_LEVEL, LOG_FORMAT)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request ID, in the thread that logs them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records.
+
+    A record can set its own rate with ``extra={"sample_rate": 0.01}``; records
+    above DEBUG are always kept.
+    """
+
+    def __init__(self, rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = getattr(record, "sample_rate", self.rate)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any ``extra=`` fields included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-")
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key != "sample_rate":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records when the queue is full instead of blocking or raising."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now, while the arguments are still valid,
+        # but leave the final formatting to the listener thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> QueueListener:
+    """Route all logging through a bounded queue drained by a background thread.
+
+    Request handlers only pay for the level check, message rendering and a queue
+    put; formatting and the write to stderr happen on the listener thread.
+    """
+    global _listener, _config
+    if _listener is not None:
+        return _listener
+    _config = (level, fmt)
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level, logging.INFO))
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork() -> None:
+    # The listener thread isn't copied into a forked worker (e.g. gunicorn with preload),
+    # so records would pile up in the inherited queue; give the child its own
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configure_logging(*_config)
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class RequestLoggingMiddleware:
+    """ASGI middleware that assigns each request an ID and logs it.
+
+    The ID comes from the X-Request-ID header when the client sends one, is
+    available to every log record made while handling the request, and is echoed
+    back in the response. Header dumps are only built when DEBUG is enabled.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.logger = logging.getLogger("app.requests")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        started_at = time.perf_counter()
+
+        if debug:
+            self.logger.debug("Incoming request: %s %s", scope["method"], scope["path"])
+            self.logger.debug("Request headers: %s", _decode_headers(scope["headers"]))
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+                if debug:
+                    self.logger.debug("Response status: %d", message["status"])
+                    self.logger.debug("Response headers: %s", _decode_headers(message["headers"]))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if debug:
+                self.logger.debug("Request finished in %.1fms", (time.perf_counter() - started_at) * 1000)
+            request_id_var.reset(token)
+
+
+_REDACTED_HEADERS = {"authorization", "cookie", "set-cookie"}
+
+
+def _decode_headers(headers) -> dict:
+    decoded = {}
+    for name, value in headers:
+        name = name.decode("latin-1")
+        decoded[name] = "<redacted>" if name.lower() in _REDACTED_HEADERS else value.decode("latin-1")
+    return decoded
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Float, DateTime
+from sqlalchemy.sql import func
+
+from ..config.database import Base
+
+class GeocodeEntry(Base):
+    __tablename__ = "geocode_cache"
+
+    location = Column(String, primary_key=True)
+    lat = Column(Float, nullable=False)
+    lon = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, LargeBinary, DateTime, Boolean
 from sqlalchemy.sql import func
 
 from ..config.database import Base
@@ -7,7 +7,8 @@ class BlacklistedToken(Base):
     __tablename__ = "blacklisted_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
-    token = Column(String, unique=True, index=True, nullable=False)
+    # sha256 of the token's jti (of the whole token for tokens issued without one)
+    jti_digest = Column(LargeBinary(32), unique=True, index=True, nullable=False)
     blacklisted_on = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     is_revoked = Column(Boolean, default=True, nullable=False) 
\ No newline at end of file
@@ -1,21 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..config.database import get_db
+from ..config.database import get_async_db
 from ..models.user import User
+from ..services.principal_cache import Principal
 from ..schemas.user import UserCreate, User as UserSchema
 from ..utils.auth import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     get_current_user,
-    blacklist_token
+    get_user_by_email,
+    get_user_by_username,
+    blacklist_token,
+    revoke_user_tokens
 )
+from ..utils.passwords import password_hasher, PasswordPoolBusy
 
 router = APIRouter()
 
 
+async def _run_password_op(coro):
+    """Await a hashing operation, turning a saturated pool into a 503."""
+    try:
+        return await coro
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+
 # Add a new model for email lookup
 class EmailLookup(BaseModel):
     email: str
@@ -27,9 +42,9 @@ class LoginRequest(BaseModel):
 
 
 @router.post("/register", response_model=UserSchema)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await get_user_by_username(user.username, db)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -37,7 +52,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Check if email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await get_user_by_email(user.email, db)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -45,31 +60,45 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await _run_password_op(password_hasher.hash(user.password))
     db_user = User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.post("/login")
 async def login_json(
         login_data: LoginRequest,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.email == login_data.email).first()
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    user = await get_user_by_email(login_data.email, db)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
 
-    access_token = create_access_token(data={"sub": user.email})
+    verified, new_hash = await _run_password_op(
+        password_hasher.verify_and_update(login_data.password, user.hashed_password)
+    )
+    if not verified:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
+        )
+
+    # Rehash with the current cost factor when the stored hash is stale
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    access_token = create_access_token(data={"sub": user.email, "token_version": user.token_version})
     return {
         "success": True,
         "access_token": access_token,
@@ -85,8 +114,8 @@ async def login_json(
 @router.post("/logout")
 async def logout(
         request: Request,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Logout the current user and blacklist their token.
@@ -97,9 +126,26 @@ async def logout(
     if auth_header and auth_header.startswith('Bearer '):
         token = auth_header.split(' ')[1]
         # Add the token to the blacklist
-        blacklist_token(token, db)
+        await blacklist_token(token, db)
 
     return {
         "success": True,
         "message": "Successfully logged out"
     }
+
+
+@router.post("/logout-all")
+async def logout_all(
+        current_user: Principal = Depends(get_current_user),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Logout the current user everywhere by revoking every token issued to them.
+    This endpoint is protected and requires authentication.
+    """
+    await revoke_user_tokens(current_user.id, db)
+
+    return {
+        "success": True,
+        "message": "Successfully logged out of all sessions"
+    }
@@ -1,24 +1,31 @@
+import asyncio
 import logging
-from typing import AsyncGenerator
+from contextlib import aclosing
+from typing import TYPE_CHECKING, AsyncGenerator, Optional
 
-from agents import trace
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends, Header
+from starlette.background import BackgroundTask
 
 from ..models.chat import ChatRequest, ChatResponse
-from ..models.user import User
-from ..services.agent_service import AgentService
+from ..services.admission import AdmissionRejected, AdmissionTicket, admission_controller
+from ..services.principal_cache import Principal
+from ..services.container import services
+from ..services.idempotency import IdempotencyConflict, idempotency_store
 from ..utils.auth import get_current_user
+from ..utils.sse import SSEResponse, sse_stream
+
+if TYPE_CHECKING:
+    from ..services.agent_service import AgentService
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-agent_service = AgentService()
 
 
-async def get_session(user: User):
+async def get_session(user: Principal):
     """Get or create a session for the authenticated user."""
+    agent_service = await services.agent_service()
     return agent_service.get_or_create_session(user.id)
 
 
@@ -28,40 +35,111 @@ async def root():
     return {"message": "Welcome to Little Dragon Assistant API"}
 
 
+async def run_agent(
+        agent_service: "AgentService",
+        user_id: int,
+        request: ChatRequest,
+        memories: asyncio.Task
+) -> AsyncGenerator[str, None]:
+    """Stream one traced agent run, dropping the memory prefetch once it ends."""
+    # Already imported by the agent service; kept out of this module's import time
+    from agents import trace
+
+    try:
+        with trace("Little Dragon Assistant Conversation", group_id=str(user_id)):
+            async for chunk in agent_service.get_agent_response(
+                user_id=user_id,
+                request=request,
+                memories=memories
+            ):
+                yield chunk
+    finally:
+        memories.cancel()
+
+
 @router.post("/chat")
 async def chat(
         request: ChatRequest,
-        current_user: User = Depends(get_current_user)
+        current_user: Principal = Depends(get_current_user),
+        idempotency_key: Optional[str] = Header(None, max_length=255)
 ):
     """Handle chat requests with user authentication and stream the response
 
+    With an Idempotency-Key header, a retry of the same request attaches to the
+    run still in progress or replays the finished one instead of running it again.
+
     Args:
         request (ChatRequest): The chat request containing the message
-        current_user (User): The authenticated user
+        current_user (Principal): The authenticated user
+        idempotency_key (Optional[str]): Client-chosen key identifying this request
 
     Returns:
-        StreamingResponse: A streaming response containing the assistant's message chunks
+        SSEResponse: A streaming response containing the assistant's message chunks
     """
+    # Admit the stream before any work is started for it
+    try:
+        ticket = await admission_controller.acquire(current_user.id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
     try:
+        # Built at startup; a request that beats the warm-up waits for it
+        agent_service = await services.agent_service()
+
         # Get or create session for the user
         user_id = current_user.id
+        headers = {}
+        # The ticket this response releases when it ends, if it still holds one
+        response_ticket: Optional[AdmissionTicket] = ticket
+
+        if idempotency_key:
+            record, created = idempotency_store.get_or_create(user_id, idempotency_key, request)
+            if created:
+                # The run is driven by the record, so it survives this connection dropping;
+                # the record holds the slot until the run itself has ended
+                memories = agent_service.prefetch_memories(user_id, request)
+                record.start(run_agent(agent_service, user_id, request, memories), ticket)
+            else:
+                headers["Idempotent-Replayed"] = "true"
+                # Following a run takes no slot; the run already holds one
+                ticket.release()
+            response_ticket = None
+            chunks = record.follow()
+        else:
+            # Start the memory search now so it runs while the response is set up
+            memories = agent_service.prefetch_memories(user_id, request)
+            chunks = run_agent(agent_service, user_id, request, memories)
+
+        def release_ticket() -> None:
+            if response_ticket is not None:
+                response_ticket.release()
 
         # Create a generator function to stream the response
-        async def stream_response() -> AsyncGenerator[str, None]:
-            with trace("Little Dragon Assistant Conversation", group_id=str(user_id)):
-                async for chunk in agent_service.get_agent_response(
-                    user_id=user_id,
-                    request=request
-                ):
-                    yield f"data: {chunk}\n\n"
-
-        # Return a streaming response
-        return StreamingResponse(
-            stream_response(),
-            media_type="text/event-stream"
-        )
+        async def stream_response() -> AsyncGenerator[bytes, None]:
+            try:
+                # Deltas are batched into frames rather than written one token at a time.
+                # aclosing() stops the run before the slot is released, not whenever the
+                # inner generator happens to be finalized
+                async with aclosing(sse_stream(chunks)) as frames:
+                    async for frame in frames:
+                        yield frame
+            finally:
+                release_ticket()
+
+        # Return a streaming response; a client disconnect closes the generator,
+        # which cancels the agent run. The background task releases the slot even
+        # if the generator never started.
+        return SSEResponse(stream_response(), headers=headers, background=BackgroundTask(release_ticket))
 
+    except IdempotencyConflict as e:
+        ticket.release()
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
+        ticket.release()
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
@@ -0,0 +1,158 @@
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from ..config.database import get_pool_status
+from ..services.admission import admission_controller
+from ..services.container import services
+from ..services.idempotency import idempotency_store
+from ..services.maintenance import maintenance_scheduler
+from ..services.principal_cache import principal_cache
+from ..services.revocation_cache import revocation_cache
+from ..utils.circuit_breaker import breaker_states
+from ..utils.metrics import registry
+from ..utils.passwords import password_hasher
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _pool_connections() -> dict:
+    status = get_pool_status()
+    return {("checked_out",): status["checked_out"], ("overflow",): status["overflow"]}
+
+
+def _memory_write_queue_depth() -> int:
+    agent_service = services.started_agent_service
+    return agent_service.memory_writer.stats()["pending"] if agent_service is not None else 0
+
+
+def _cache_stats() -> dict:
+    caches = {"principal": principal_cache.stats(), "revocation": revocation_cache.stats()}
+    agent_service = services.started_agent_service
+    if agent_service is not None:
+        caches["memory_search"] = agent_service.memory_cache.stats()
+    return caches
+
+
+def _cache_lookups() -> dict:
+    lookups = {}
+    for name, stats in _cache_stats().items():
+        lookups[(name, "hit")] = stats.get("hits", 0)
+        lookups[(name, "miss")] = stats.get("misses", 0)
+    return lookups
+
+
+def _session_store_stats() -> dict:
+    agent_service = services.started_agent_service
+    return agent_service.sessions.stats() if agent_service is not None else {}
+
+
+# Point-in-time values are read only when the endpoint is scraped
+registry.gauge(
+    "chat_streams_in_flight",
+    "Chat streams currently admitted on this worker",
+    lambda: admission_controller.stats()["in_flight"]
+)
+registry.gauge(
+    "chat_streams_waiting",
+    "Chat requests queued for a stream slot on this worker",
+    lambda: admission_controller.stats()["waiting"]
+)
+registry.gauge(
+    "db_pool_connections",
+    "Async engine pool connections by state",
+    _pool_connections,
+    ("state",)
+)
+registry.gauge(
+    "password_pool_waiting",
+    "bcrypt operations waiting for a worker process",
+    lambda: password_hasher.stats()["waiting"]
+)
+registry.gauge(
+    "memory_write_queue_depth",
+    "Conversation turns waiting to be written to memory",
+    _memory_write_queue_depth
+)
+registry.callback_counter(
+    "cache_lookups_total",
+    "Lookups in this worker's principal, revocation and memory search caches",
+    _cache_lookups,
+    ("cache", "result")
+)
+registry.gauge(
+    "memory_search_cache_bytes",
+    "Bytes of memory search results cached on this worker (in-process backend only)",
+    lambda: _cache_stats().get("memory_search", {}).get("bytes", 0)
+)
+registry.gauge(
+    "session_store_sessions",
+    "Chat sessions held on this worker (in-memory backend only)",
+    lambda: _session_store_stats().get("sessions", 0)
+)
+registry.gauge(
+    "session_store_bytes",
+    "Bytes of chat history held on this worker (in-memory backend only)",
+    lambda: _session_store_stats().get("bytes", 0)
+)
+registry.gauge(
+    "circuit_breaker_open",
+    "1 while an upstream endpoint's circuit breaker is not closed",
+    lambda: {(breaker["name"],): float(breaker["state"] != "closed") for breaker in breaker_states()},
+    ("endpoint",)
+)
+
+
+@router.get("/health/live")
+async def liveness():
+    """The worker's event loop is serving requests; doesn't depend on anything upstream."""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """503 until startup warm-up has built the agent and reached the database, and again while draining."""
+    status = {**services.readiness(), "draining": admission_controller.draining}
+    ready = status["ready"] and not status["draining"]
+    return JSONResponse(status, status_code=200 if ready else 503)
+
+
+@router.get("/breakers")
+async def get_breakers():
+    """Current state of the upstream circuit breakers, i.e. which API paths are live."""
+    return {"breakers": breaker_states()}
+
+
+@router.get("/agent")
+async def get_agent_stats():
+    """Agent run counters, including runs cancelled by client disconnects, context token use, and tool latency."""
+    agent_service = await services.agent_service()
+    return agent_service.stats()
+
+
+@router.get("/admission")
+async def get_admission_stats():
+    """Chat streams in flight and waiting on this worker, turned away, or served by idempotent replay."""
+    return {**admission_controller.stats(), "idempotency": idempotency_store.stats()}
+
+
+@router.get("/caches")
+async def get_cache_stats():
+    """Hit rates and sizes of this worker's caches, and the session store's memory per active session."""
+    return {**_cache_stats(), "sessions": _session_store_stats()}
+
+
+@router.get("/maintenance")
+async def get_maintenance_stats():
+    """Background maintenance jobs run by this worker: last run, rows purged and throughput, table size."""
+    return maintenance_scheduler.stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of latency histograms, counters and gauges."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,204 @@
+"""Production entry point: ``python -m app.server``.
+
+Serves ``main:app`` from SERVER_WORKERS processes on SERVER_HOST:SERVER_PORT.
+By default uvicorn's own supervisor spawns the workers, each importing the app
+itself. With SERVER_MANAGER=gunicorn, gunicorn manages uvicorn workers instead;
+that is needed for SERVER_PRELOAD (import once in the master, then fork) and
+for rolling restarts with ``kill -HUP``.
+
+The event loop and HTTP parser come from SERVER_LOOP and SERVER_HTTP; "auto"
+uses uvloop and httptools when they are installed.
+
+On shutdown or restart a worker stops accepting connections and admitting
+chats, then gives open SSE streams up to SERVER_GRACEFUL_TIMEOUT seconds to
+finish before cancelling them.
+
+Every worker runs the app's startup and shutdown hooks, so sessions, caches,
+pools and clients are per process. Settings that keep state which must be
+shared between workers are rejected when more than one worker is configured.
+"""
+import argparse
+import logging
+import sys
+import warnings
+from typing import List, Tuple
+
+import uvicorn
+from uvicorn.supervisors import ChangeReload, Multiprocess
+
+from .config.logging_config import configure_logging, stop_logging
+from .config.settings import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SERVER_MANAGER,
+    SERVER_LOOP,
+    SERVER_HTTP,
+    SERVER_PRELOAD,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_KEEPALIVE,
+    SERVER_BACKLOG,
+    SERVER_MAX_REQUESTS,
+    SESSION_BACKEND,
+    INVALIDATION_BACKEND,
+    MEMORY_BACKEND,
+    MEMORY_CACHE_BACKEND
+)
+from .services.admission import admission_controller
+
+logger = logging.getLogger(__name__)
+
+APP = "main:app"
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that stops admitting chat streams as soon as shutdown starts.
+
+    uvicorn already closes the listening socket and waits for open responses;
+    this also turns away chats that were read, or queued for a slot, before
+    the signal arrived, so they don't start a stream that would be cut off.
+    """
+
+    def handle_exit(self, sig, frame) -> None:
+        admission_controller.start_draining()
+        super().handle_exit(sig, frame)
+
+
+def check_shared_state(workers: int) -> Tuple[List[str], List[str]]:
+    """Return (errors, warnings) for process-local state that differs between workers."""
+    errors, notes = [], []
+    if workers <= 1:
+        return errors, notes
+    if SESSION_BACKEND == "memory":
+        errors.append("SESSION_BACKEND=memory keeps conversation history in one worker; use redis")
+    if INVALIDATION_BACKEND == "memory":
+        errors.append("INVALIDATION_BACKEND=memory only evicts logged-out tokens in one worker; use redis")
+    if MEMORY_BACKEND == "local":
+        errors.append("MEMORY_BACKEND=local indexes can't be written by more than one process; use mem0")
+    if MEMORY_CACHE_BACKEND == "memory":
+        errors.append(
+            "MEMORY_CACHE_BACKEND=memory serves memories another worker has replaced "
+            "until MEMORY_CACHE_TTL_SECONDS; use redis or none"
+        )
+    notes.append("Idempotency-Key replay, per-user stream caps and CHAT_MAX_STREAMS apply per worker")
+    notes.append("/ops/metrics and the /ops/* stats describe the worker that served the request, not the server")
+    return errors, notes
+
+
+def _config(workers: int, reload: bool = False) -> uvicorn.Config:
+    return uvicorn.Config(
+        APP,
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=workers,
+        reload=reload,
+        loop=SERVER_LOOP,
+        http=SERVER_HTTP,
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        limit_max_requests=SERVER_MAX_REQUESTS or None,
+        # The app routes all logging, uvicorn's included, through configure_logging()
+        log_config=None
+    )
+
+
+def run_uvicorn(workers: int, reload: bool = False) -> None:
+    config = _config(workers, reload)
+    server = DrainingServer(config)
+    if config.should_reload:
+        ChangeReload(config, target=server.run, sockets=[config.bind_socket()]).run()
+    elif config.workers > 1:
+        # Dead workers, including ones recycled by SERVER_MAX_REQUESTS, are replaced
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+    else:
+        server.run()
+
+
+def _gunicorn_worker_class():
+    with warnings.catch_warnings():
+        # uvicorn.workers warns that it's moving to a separate package
+        warnings.simplefilter("ignore", DeprecationWarning)
+        from uvicorn.workers import UvicornWorker
+    from gunicorn.arbiter import Arbiter
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {
+            "loop": SERVER_LOOP,
+            "http": SERVER_HTTP,
+            "timeout_graceful_shutdown": SERVER_GRACEFUL_TIMEOUT
+        }
+
+        async def _serve(self) -> None:
+            # UvicornWorker._serve, with DrainingServer in place of uvicorn.Server
+            self.config.app = self.wsgi
+            server = DrainingServer(config=self.config)
+            self._install_sigquit_handler()
+            await server.serve(sockets=self.sockets)
+            if not server.started:
+                sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+    return Worker
+
+
+def run_gunicorn(workers: int) -> None:
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("SERVER_MANAGER=gunicorn requires gunicorn: pip install gunicorn")
+
+    options = {
+        "bind": f"{SERVER_HOST}:{SERVER_PORT}",
+        "workers": workers,
+        "worker_class": _gunicorn_worker_class(),
+        "preload_app": SERVER_PRELOAD,
+        # Leave the worker time to finish its own drain before the master kills it
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT + 5,
+        "keepalive": SERVER_KEEPALIVE,
+        "backlog": SERVER_BACKLOG,
+        "max_requests": SERVER_MAX_REQUESTS,
+        "max_requests_jitter": SERVER_MAX_REQUESTS // 10
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    Application().run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API server")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--manager", choices=["uvicorn", "gunicorn"], default=SERVER_MANAGER)
+    parser.add_argument("--reload", action="store_true", help="Restart on code changes (development, one worker)")
+    args = parser.parse_args()
+
+    configure_logging()
+
+    errors, notes = check_shared_state(args.workers)
+    for note in notes:
+        logger.warning(note)
+    if errors:
+        for error in errors:
+            logger.error(f"Can't run {args.workers} workers: {error}")
+        stop_logging()
+        sys.exit(1)
+
+    if args.reload:
+        run_uvicorn(1, reload=True)
+    elif args.manager == "gunicorn":
+        run_gunicorn(args.workers)
+    else:
+        if SERVER_PRELOAD:
+            logger.warning("SERVER_PRELOAD only applies with SERVER_MANAGER=gunicorn")
+        run_uvicorn(args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import math
+from collections import defaultdict
+from typing import Dict, Optional
+
+from ..config.settings import (
+    CHAT_MAX_STREAMS_PER_USER,
+    CHAT_MAX_STREAMS,
+    CHAT_QUEUE_SIZE,
+    CHAT_QUEUE_TIMEOUT,
+    CHAT_RATE_LIMIT_BACKEND,
+    CHAT_RATE_LIMIT_PER_MINUTE,
+    CHAT_RATE_LIMIT_BURST
+)
+from ..utils.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a chat stream can't be admitted; carries the HTTP status and Retry-After."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+# Refills the bucket from the time elapsed since the last call, using the Redis
+# server clock so every worker agrees. Returns {allowed, seconds until a token}.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+# Gives back a token taken by a request that was then turned away for another reason
+_REFUND_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+    redis.call('HSET', KEYS[1], 'tokens', math.min(burst, tokens + 1))
+end
+return 0
+"""
+
+
+class RedisTokenBucket:
+    """Per-user token bucket shared by all workers through Redis.
+
+    Fails open: if Redis is unreachable requests are allowed and only the
+    per-worker limits apply.
+    """
+
+    KEY_PREFIX = "chat_rate:"
+
+    def __init__(self, per_minute: float = CHAT_RATE_LIMIT_PER_MINUTE, burst: int = CHAT_RATE_LIMIT_BURST):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self._script = None
+        self._refund_script = None
+
+    async def acquire(self, user_id: int) -> float:
+        """Take a token for the user; returns 0 if allowed, else seconds until one is available."""
+        if self._script is None:
+            self._script = get_redis().register_script(_TOKEN_BUCKET_SCRIPT)
+        try:
+            allowed, retry_after = await self._script(
+                keys=[f"{self.KEY_PREFIX}{user_id}"],
+                args=[self.rate, self.burst]
+            )
+        except Exception as e:
+            logger.warning(f"Rate limit check failed, allowing request: {str(e)}")
+            return 0.0
+        return 0.0 if int(allowed) else float(retry_after)
+
+    async def refund(self, user_id: int) -> None:
+        """Return the token taken by ``acquire`` when the request wasn't admitted after all."""
+        if self._refund_script is None:
+            self._refund_script = get_redis().register_script(_REFUND_SCRIPT)
+        try:
+            await self._refund_script(keys=[f"{self.KEY_PREFIX}{user_id}"], args=[self.burst])
+        except Exception as e:
+            logger.warning(f"Rate limit refund failed: {str(e)}")
+
+
+class AdmissionTicket:
+    """A held stream slot. ``release`` is idempotent so every exit path can call it."""
+
+    def __init__(self, controller: "AdmissionController", user_id: int):
+        self._controller = controller
+        self.user_id = user_id
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self.user_id)
+
+
+class AdmissionController:
+    """Limits concurrent chat streams per user and per worker.
+
+    A user at their stream cap is turned away with 429 straight away. When the
+    worker is at its cap, up to ``queue_size`` requests wait up to
+    ``queue_timeout`` seconds for a slot; beyond that they get 503. With a rate
+    limiter configured, each request first takes a token from the user's bucket,
+    which holds across workers; the token is given back if the worker is then
+    too busy to admit the request.
+    """
+
+    def __init__(
+            self,
+            per_user: int = CHAT_MAX_STREAMS_PER_USER,
+            max_streams: int = CHAT_MAX_STREAMS,
+            queue_size: int = CHAT_QUEUE_SIZE,
+            queue_timeout: float = CHAT_QUEUE_TIMEOUT,
+            rate_limiter: Optional[RedisTokenBucket] = None
+    ):
+        self.per_user = per_user
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.rate_limiter = rate_limiter
+        self._slots = asyncio.Semaphore(max_streams)
+        self._per_user: Dict[int, int] = defaultdict(int)
+        self._in_flight = 0
+        self._waiting = 0
+        self.draining = False
+        self.admitted = 0
+        self.rejected_user = 0
+        self.rejected_busy = 0
+        self.rejected_rate = 0
+
+    def start_draining(self) -> None:
+        """Refuse new streams from now on; streams already admitted run to completion."""
+        self.draining = True
+
+    async def acquire(self, user_id: int) -> AdmissionTicket:
+        if self.draining:
+            self.rejected_busy += 1
+            raise AdmissionRejected(503, "Server is restarting, please retry shortly", 1)
+
+        if self._per_user.get(user_id, 0) >= self.per_user:
+            self.rejected_user += 1
+            raise AdmissionRejected(429, "Too many concurrent chats, please wait for one to finish", 1)
+
+        # Counted before any await so concurrent requests from one user can't slip past the cap
+        self._per_user[user_id] += 1
+        rate_token = False
+        try:
+            if self.rate_limiter is not None:
+                retry_after = await self.rate_limiter.acquire(user_id)
+                if retry_after > 0:
+                    self.rejected_rate += 1
+                    raise AdmissionRejected(429, "Rate limit exceeded", retry_after)
+                rate_token = True
+
+            if self._slots.locked() and self._waiting >= self.queue_size:
+                self.rejected_busy += 1
+                raise AdmissionRejected(503, "Server is busy, please retry shortly", 1)
+
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_busy += 1
+                raise AdmissionRejected(503, "Server is busy, please retry shortly", self.queue_timeout)
+            finally:
+                self._waiting -= 1
+        except BaseException:
+            self._release_user(user_id)
+            # Turned away by a busy worker, or the client left while queued: not the user's chat to pay for
+            if rate_token:
+                await self.rate_limiter.refund(user_id)
+            raise
+
+        self._in_flight += 1
+        self.admitted += 1
+        return AdmissionTicket(self, user_id)
+
+    def _release_user(self, user_id: int) -> None:
+        self._per_user[user_id] -= 1
+        if self._per_user[user_id] <= 0:
+            del self._per_user[user_id]
+
+    def _release(self, user_id: int) -> None:
+        self._in_flight -= 1
+        self._slots.release()
+        self._release_user(user_id)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_streams": self.max_streams,
+            "active_users": len(self._per_user),
+            "draining": self.draining,
+            "admitted": self.admitted,
+            "rejected_user": self.rejected_user,
+            "rejected_busy": self.rejected_busy,
+            "rejected_rate": self.rejected_rate
+        }
+
+
+def create_admission_controller() -> AdmissionController:
+    """Build the controller, with the Redis token bucket if CHAT_RATE_LIMIT_BACKEND is "redis"."""
+    rate_limiter = RedisTokenBucket() if CHAT_RATE_LIMIT_BACKEND == "redis" else None
+    return AdmissionController(rate_limiter=rate_limiter)
+
+
+admission_controller = create_admission_controller()
@@ -1,98 +1,267 @@
-from typing import List, Dict, AsyncGenerator
+import asyncio
+import importlib.metadata
+import logging
+import time
+from typing import List, Dict, AsyncGenerator, Any, Optional, Set, Tuple
 
-from agents import Agent, Runner, RunResult
-from mem0 import MemoryClient
+from agents import Agent, ModelSettings, Runner, RunResultStreaming
 from openai.types.responses import ResponseTextDeltaEvent
+from packaging.specifiers import SpecifierSet
+from packaging.version import Version
 
 from ..config.settings import (
     OPENAI_MODEL,
-    MEM0_API_KEY
+    MEM0_SEARCH_TIMEOUT,
+    MEMORY_WRITES_ENABLED
+)
+from ..abilities.registry import ability_registry
+from ..utils.metrics import (
+    MEMORY_SEARCH_DURATION,
+    CHAT_TIME_TO_FIRST_TOKEN,
+    CHAT_TOKENS_PER_SECOND,
+    CHAT_RUNS,
+    CANCELLED_TOKENS_EMITTED
 )
 from ..models.chat import AssistantContext, ChatRequest
+from .context_builder import ContextBuilder
+from .memory_backends import create_memory_backend
+from .memory_cache import create_memory_search_cache
+from .memory_writer import MemoryWriteBehind
+from .session_store import create_session_store
+
+logger = logging.getLogger(__name__)
+
+# openai-agents releases whose RunResultStreaming has no public cancel(); for these
+# the run is stopped with the private _cleanup_tasks(), which stream_events() itself
+# calls on exit. Re-check when upgrading past this range.
+_PRIVATE_CANCEL_VERSIONS = SpecifierSet("<0.1")
+_AGENTS_VERSION = Version(importlib.metadata.version("openai-agents"))
 
 
 class AgentService:
     def __init__(self):
-        self.chat_sessions: Dict[int, RunResult] = {}
-        self.mem0_client = MemoryClient(api_key=MEM0_API_KEY)
+        self.sessions = create_session_store()
+        self.context_builder = ContextBuilder(OPENAI_MODEL)
+        self.memory = create_memory_backend()
+        self.memory_cache = create_memory_search_cache()
+        self.memory_writer = MemoryWriteBehind(self.add_memories)
+        self._cache_writes: Set[asyncio.Task] = set()
+
+        # Abilities are discovered on first use, not at startup
+        self.abilities = ability_registry
 
-        # Initialize MCP servers
-        self.mcp_servers = []
+        self.runs_completed = 0
+        self.runs_cancelled = 0
+        self.cancelled_tokens_emitted = 0
 
-        # Create the agent with MCP servers
+        # Create the agent; tools are attached by get_agent()
         self.agent = Agent[AssistantContext](
             name="little_dragon",
             instructions="You are a helpful personal assistant",
-            model=OPENAI_MODEL,
-            mcp_servers=self.mcp_servers
+            model=OPENAI_MODEL
         )
 
+    def start(self) -> None:
+        """Start background workers owned by the service."""
+        self.memory_writer.start()
+
+    async def close(self) -> None:
+        """Flush pending memory writes, then release network clients held by the service."""
+        await self.memory_writer.drain()
+        await self.memory.close()
+        await self.abilities.aclose()
+
+    def get_agent(self) -> Agent[AssistantContext]:
+        """The agent with the registry's tools attached, loading abilities on first call."""
+        if not self.agent.tools:
+            tools = self.abilities.tools()
+            if tools:
+                # Independent tool calls from one model turn are run concurrently
+                self.agent.tools = tools
+                self.agent.model_settings = ModelSettings(parallel_tool_calls=True)
+        return self.agent
+
+    @staticmethod
+    def _cancel_run(stream_result: RunResultStreaming) -> None:
+        """Stop a streamed run: the model request, pending tool calls and guardrails."""
+        cancel = getattr(stream_result, "cancel", None)
+        if callable(cancel):
+            cancel()
+        elif _AGENTS_VERSION in _PRIVATE_CANCEL_VERSIONS and hasattr(stream_result, "_cleanup_tasks"):
+            stream_result._cleanup_tasks()
+        else:
+            logger.warning("Can't cancel agent runs with openai-agents %s; the run continues in the background", _AGENTS_VERSION)
+
     def get_or_create_session(self, user_id: int) -> int:
         """Get or create a session for a user. Now requires user_id."""
         if not user_id:
             raise ValueError("user_id is required")
         return user_id
 
-    def get_session_messages(self, user_id: int) -> List[Dict[str, str]]:
-        """Get messages for a specific user."""
-        return self.chat_sessions.get(user_id, [])
+    async def get_session_messages(self, user_id: int) -> List[Dict[str, str]]:
+        """Get recent conversation turns for a specific user."""
+        return await self.sessions.get_messages(user_id)
+
+    async def _lookup_memories(
+            self,
+            user_id: int,
+            query: str,
+            records_limit: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Search results for a query, and the cache generation they were searched at (None if cached)."""
+        cached = await self.memory_cache.get(user_id, query, records_limit)
+        if cached is not None:
+            return cached, None
+        # Taken before the search, so results that predate a memory write aren't cached after it
+        generation = await self.memory_cache.generation(user_id)
+        results = await self.memory.search(query=query, user_id=user_id, limit=records_limit)
+        return results, generation
+
+    async def search_memories(self, user_id: int, query: str, records_limit: int = 10) -> List[Dict[str, Any]]:
+        """Search the memory backend for relevant memories, giving up after MEM0_SEARCH_TIMEOUT.
+
+        A slow or failing memory service or cache must not hold up the chat, so the
+        deadline covers the cache lookup too, and both cases return no memories
+        rather than raising. Successful results are cached per user in the background.
+        """
+        started_at = time.perf_counter()
+        try:
+            results, generation = await asyncio.wait_for(
+                self._lookup_memories(user_id, query, records_limit),
+                timeout=MEM0_SEARCH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            MEMORY_SEARCH_DURATION.observe(time.perf_counter() - started_at, ("timeout",))
+            logger.warning("Memory search for user %s exceeded %.2fs, continuing without context", user_id, MEM0_SEARCH_TIMEOUT)
+            return []
+        except Exception as e:
+            MEMORY_SEARCH_DURATION.observe(time.perf_counter() - started_at, ("error",))
+            logger.error(f"Memory search failed for user {user_id}: {str(e)}")
+            return []
 
-    async def get_agent_response(self, user_id: int, request: ChatRequest) -> AsyncGenerator[str, None]:
-        """Get agent response for a specific user as a streaming response."""
-        input_messages = await self.get_context(user_id, request)
-        stream_result = Runner.run_streamed(self.agent, input=input_messages)
+        if generation is None:
+            MEMORY_SEARCH_DURATION.observe(time.perf_counter() - started_at, ("cache_hit",))
+            return results
+
+        MEMORY_SEARCH_DURATION.observe(time.perf_counter() - started_at, ("ok",))
+        task = asyncio.create_task(self.memory_cache.set(user_id, query, records_limit, results, generation))
+        self._cache_writes.add(task)
+        task.add_done_callback(self._cache_writes.discard)
+        return results
+
+    async def add_memories(self, user_id: int, messages: List[Dict[str, str]], metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Write messages to the memory backend and drop the user's cached searches."""
+        await self.memory.add(messages, user_id=user_id, metadata=metadata)
+        await self.memory_cache.invalidate(user_id)
+
+    def prefetch_memories(self, user_id: int, request: ChatRequest, records_limit: int = 10) -> asyncio.Task:
+        """Start the memory search in the background so it overlaps request setup."""
+        return asyncio.create_task(
+            self.search_memories(user_id, request.message.content, records_limit)
+        )
+
+    async def get_agent_response(
+            self,
+            user_id: int,
+            request: ChatRequest,
+            memories: Optional[asyncio.Task] = None
+    ) -> AsyncGenerator[str, None]:
+        """Get agent response for a specific user as a streaming response.
+
+        If the consumer stops early (the client disconnected), the run is cancelled
+        straight away and the partial turn is not saved.
+        """
+        started_at = time.perf_counter()
+        input_messages = await self.get_context(user_id, request, memories=memories)
+        stream_result = Runner.run_streamed(self.get_agent(), input=input_messages)
 
         # Collect the full response
-        full_response = ""
+        parts = []
+        first_delta_at = 0.0
+        failed = False
 
         # Stream the response chunks
-        async for event in stream_result.stream_events():
-            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
-                full_response += event.data.delta
-                yield event.data.delta
-
-        # # Save the complete agent response to mem0
-        # self.mem0_client.add(
-        #     messages=[{
-        #         "role": "assistant",
-        #         "content": full_response
-        #     }],
-        #     user_id=str(user_id),
-        #     run_id=request.cookies.get("access_token")
-        # )
-
-    async def get_context(self, user_id: int, request: ChatRequest, records_limit=10):
-        """Get context for a specific user from mem0 using semantic search."""
-        # Save the new user message to mem0
-        # self.mem0_client.add(
-        #     messages=[{
-        #         "role": request.message.role,
-        #         "content": request.message.content
-        #     }],
-        #     user_id=str(user_id),
-        #     metadata={"message_type": "user"}
-        # )
+        try:
+            async for event in stream_result.stream_events():
+                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                    if not parts:
+                        first_delta_at = time.perf_counter()
+                        CHAT_TIME_TO_FIRST_TOKEN.observe(first_delta_at - started_at)
+                    parts.append(event.data.delta)
+                    yield event.data.delta
+        except Exception:
+            failed = True
+            CHAT_RUNS.inc(labels=("error",))
+            raise
+        finally:
+            if not stream_result.is_complete:
+                self._cancel_run(stream_result)
+                # Only a consumer that stopped early (GeneratorExit, CancelledError) is a cancellation
+                if not failed:
+                    self._record_cancelled(user_id, parts)
+
+        self.runs_completed += 1
+        CHAT_RUNS.inc(labels=("completed",))
+        if len(parts) > 1:
+            streaming_time = time.perf_counter() - first_delta_at
+            if streaming_time > 0:
+                CHAT_TOKENS_PER_SECOND.observe((len(parts) - 1) / streaming_time)
+        full_response = "".join(parts)
+        turn = [
+            {"role": request.message.role, "content": request.message.content},
+            {"role": "assistant", "content": full_response}
+        ]
+        await self.sessions.append(user_id, turn)
+
+        # Save the turn to memory in the background, off the response path
+        if MEMORY_WRITES_ENABLED:
+            self.memory_writer.submit(user_id, turn)
+
+    def _record_cancelled(self, user_id: int, parts: List[str]) -> None:
+        # How much the cancel saved isn't knowable: the reply's length has no fixed bound
+        emitted = self.context_builder.tokenizer.count("".join(parts))
+        self.runs_cancelled += 1
+        self.cancelled_tokens_emitted += emitted
+        CHAT_RUNS.inc(labels=("cancelled",))
+        CANCELLED_TOKENS_EMITTED.inc(emitted)
+        logger.info("Cancelled agent run for user %s after %d tokens", user_id, emitted)
 
+    def stats(self) -> dict:
+        return {
+            "runs_completed": self.runs_completed,
+            "runs_cancelled": self.runs_cancelled,
+            "cancelled_tokens_emitted": self.cancelled_tokens_emitted,
+            "context": self.context_builder.stats(),
+            "abilities": self.abilities.stats()
+        }
+
+    async def get_context(
+            self,
+            user_id: int,
+            request: ChatRequest,
+            records_limit=10,
+            memories: Optional[asyncio.Task] = None
+    ):
+        """Get context for a specific user from the memory backend using semantic search.
+
+        If ``memories`` is a task started by ``prefetch_memories`` its result is used
+        instead of issuing a new search. Memories and recent turns from the user's
+        session are fitted to the model's token budget by the context builder.
+        """
         # Search for relevant context using the user's message
-        search_results = self.mem0_client.search(
-            query=request.message.content,
-            user_id=str(user_id),
-            limit=records_limit
-        )
+        if memories is not None:
+            search_results = await memories
+        else:
+            search_results = await self.search_memories(user_id, request.message.content, records_limit)
 
-        # Convert search results to the expected format
-        input_messages = [
-            {
-                "role": result["metadata"]["message_type"] if result.get("metadata") else "user",
-                "content": result["memory"]
+        # Fit memories and the recent conversation to the token budget, current message last
+        input_messages, _ = self.context_builder.build(
+            memories=search_results,
+            history=await self.get_session_messages(user_id),
+            current={
+                "role": request.message.role,
+                "content": request.message.content
             }
-            for result in search_results
-        ]
-
-        # Add the current message at the end
-        input_messages.append({
-            "role": request.message.role,
-            "content": request.message.content
-        })
+        )
 
         return input_messages
@@ -0,0 +1,133 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from ..config.database import async_engine
+from ..config.settings import WARM_UP_RETRY_SECONDS
+
+if TYPE_CHECKING:
+    from .agent_service import AgentService
+
+logger = logging.getLogger(__name__)
+
+# Readiness waits for these; the others only degrade a chat (no memories, estimated token counts)
+REQUIRED_COMPONENTS = ("agent", "database")
+
+# Failed steps are retried with doubling delays up to this
+MAX_RETRY_SECONDS = 60.0
+
+
+class ServiceContainer:
+    """Owns the services that are too slow, or too network-dependent, to build at import.
+
+    ``start()`` runs the warm-up steps in the background, so the server is
+    listening (and live) straight away and reports ready once the required
+    steps have succeeded; failed steps are retried with backoff.
+    ``agent_service()`` builds the service on demand if a request gets there
+    before the warm-up does.
+    """
+
+    def __init__(self, retry_seconds: float = WARM_UP_RETRY_SECONDS):
+        self.retry_seconds = retry_seconds
+        self.components: Dict[str, dict] = {}
+        self._agent_service: Optional["AgentService"] = None
+        self._agent_lock = asyncio.Lock()
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    @property
+    def started_agent_service(self) -> Optional["AgentService"]:
+        """The agent service if it has been built, without building it."""
+        return self._agent_service
+
+    async def agent_service(self) -> "AgentService":
+        if self._agent_service is None:
+            async with self._agent_lock:
+                if self._agent_service is None:
+                    # The agents SDK and openai take most of a second to import; keep that off the event loop
+                    module = await asyncio.to_thread(importlib.import_module, f"{__package__}.agent_service")
+                    service = module.AgentService()
+                    service.start()
+                    self._agent_service = service
+        return self._agent_service
+
+    def start(self) -> None:
+        """Warm up in the background."""
+        if self._warm_up_task is None:
+            self._warm_up_task = asyncio.create_task(self._warm_up())
+
+    async def _warm_up_agent(self) -> None:
+        service = await self.agent_service()
+        # Discover abilities and attach their tools
+        service.get_agent()
+
+    async def _warm_up_memory(self) -> None:
+        service = await self.agent_service()
+        await service.memory.warm_up()
+
+    async def _warm_up_tokenizer(self) -> None:
+        service = await self.agent_service()
+        # tiktoken downloads its encoding the first time it's used
+        await asyncio.to_thread(service.context_builder.tokenizer.load)
+
+    @staticmethod
+    async def _warm_up_database() -> None:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[None]]) -> bool:
+        started_at = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            self.components[name] = {"ready": False, "error": str(e)}
+            logger.warning(f"Warm-up of {name} failed: {str(e)}")
+            return False
+        seconds = time.perf_counter() - started_at
+        self.components[name] = {"ready": True, "seconds": round(seconds, 3)}
+        logger.info("Warmed up %s in %.2fs", name, seconds)
+        return True
+
+    async def _warm_up(self) -> None:
+        steps = {
+            "agent": self._warm_up_agent,
+            "database": self._warm_up_database,
+            "memory": self._warm_up_memory,
+            "tokenizer": self._warm_up_tokenizer
+        }
+        for name in steps:
+            self.components[name] = {"ready": False}
+
+        pending = dict(steps)
+        delay = self.retry_seconds
+        while pending:
+            results = await asyncio.gather(*(self._run_step(name, step) for name, step in pending.items()))
+            pending = {name: step for (name, step), ok in zip(pending.items(), results) if not ok}
+            if pending:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_SECONDS)
+
+    @property
+    def ready(self) -> bool:
+        return all(self.components.get(name, {}).get("ready") for name in REQUIRED_COMPONENTS)
+
+    def readiness(self) -> dict:
+        return {"ready": self.ready, "components": self.components}
+
+    async def close(self) -> None:
+        if self._warm_up_task is not None:
+            self._warm_up_task.cancel()
+            try:
+                await self._warm_up_task
+            except asyncio.CancelledError:
+                pass
+            self._warm_up_task = None
+        if self._agent_service is not None:
+            await self._agent_service.close()
+            self._agent_service = None
+
+
+services = ServiceContainer()
@@ -0,0 +1,292 @@
+import logging
+import math
+import re
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.settings import (
+    CONTEXT_TOKEN_BUDGETS,
+    CONTEXT_TOKEN_BUDGET_DEFAULT,
+    CONTEXT_HISTORY_SHARE,
+    CONTEXT_MAX_MEMORY_TOKENS,
+    CONTEXT_DUPLICATE_THRESHOLD,
+    CONTEXT_RECENCY_WEIGHT,
+    CONTEXT_RECENCY_HALF_LIFE_DAYS
+)
+from ..utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_TOKENS = registry.histogram(
+    "chat_context_tokens",
+    "Prompt tokens per request: used after budgeting, and what everything available would have cost",
+    ("kind",),
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+)
+CONTEXT_BUDGET_USED = registry.histogram(
+    "chat_context_budget_used_ratio",
+    "Share of the model's context token budget used per request",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0)
+)
+CONTEXT_ITEMS_DROPPED = registry.counter(
+    "chat_context_items_dropped_total",
+    "History messages and memories left out of the prompt, by kind and reason",
+    ("kind", "reason")
+)
+
+# Tokens the chat format adds around every message
+_MESSAGE_OVERHEAD = 4
+
+_WORD = re.compile(r"\w+")
+
+
+class Tokenizer:
+    """Counts and truncates text in model tokens using tiktoken.
+
+    The encoding is loaded on first use. If it can't be (tiktoken downloads it the
+    first time), counts fall back to a ~4 characters per token estimate so an
+    offline worker still works.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+
+    def load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            import tiktoken
+
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable for {self.model}, estimating token counts: {str(e)}")
+
+    def count(self, text: str) -> int:
+        self.load()
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / 4)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        self.load()
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            return self._encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * 4]
+
+
+@dataclass
+class ContextStats:
+    """Token accounting for one assembled prompt."""
+    model: str
+    budget: int
+    tokens_used: int
+    tokens_unbudgeted: int
+    current_tokens: int
+    history_tokens: int
+    memory_tokens: int
+    history_in: int
+    history_kept: int
+    memories_in: int
+    memories_kept: int
+    duplicates_dropped: int
+    truncated: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_unbudgeted - self.tokens_used)
+
+
+def _shingles(text: str) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) < 3:
+        return set(words)
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    return len(a & b) / len(a | b)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class ContextBuilder:
+    """Assembles agent input from memories, session history and the current message.
+
+    The current message is always included. Recent history gets up to
+    ``history_share`` of what remains, newest turns first. Memories then fill the
+    rest: near-duplicates are removed, the rest ranked by relevance score blended
+    with recency, each capped at ``max_memory_tokens``, and taken in rank order
+    while they fit. Ties keep the backend's order, so output is deterministic.
+    """
+
+    def __init__(
+            self,
+            model: str,
+            budget: Optional[int] = None,
+            history_share: float = CONTEXT_HISTORY_SHARE,
+            max_memory_tokens: int = CONTEXT_MAX_MEMORY_TOKENS,
+            duplicate_threshold: float = CONTEXT_DUPLICATE_THRESHOLD,
+            recency_weight: float = CONTEXT_RECENCY_WEIGHT,
+            recency_half_life_days: float = CONTEXT_RECENCY_HALF_LIFE_DAYS
+    ):
+        self.model = model
+        self.budget = budget or CONTEXT_TOKEN_BUDGETS.get(model, CONTEXT_TOKEN_BUDGET_DEFAULT)
+        self.history_share = history_share
+        self.max_memory_tokens = max_memory_tokens
+        self.duplicate_threshold = duplicate_threshold
+        self.recency_weight = recency_weight
+        self.recency_half_life = recency_half_life_days * 86400
+        self.tokenizer = Tokenizer(model)
+        self.requests = 0
+        self.tokens_used_total = 0
+        self.tokens_saved_total = 0
+        self.history_dropped_total = 0
+        self.memories_dropped_total = 0
+        self.duplicates_dropped_total = 0
+
+    def _message_tokens(self, content: str) -> int:
+        return self.tokenizer.count(content) + _MESSAGE_OVERHEAD
+
+    def _rank(self, memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        scores = [float(memory.get("score") or 0.0) for memory in memories]
+        top_score = max(scores, default=0.0) or 1.0
+
+        def rank_key(item: Tuple[int, Dict[str, Any]]):
+            position, memory = item
+            relevance = scores[position] / top_score
+            created_at = _parse_timestamp(memory.get("created_at") or memory.get("updated_at"))
+            if created_at is None:
+                recency = 0.0
+            else:
+                age = max(0.0, (now - created_at).total_seconds())
+                recency = 0.5 ** (age / self.recency_half_life)
+            combined = (1 - self.recency_weight) * relevance + self.recency_weight * recency
+            return -combined, position
+
+        return [memory for _, memory in sorted(enumerate(memories), key=rank_key)]
+
+    def _dedupe(self, memories: List[Dict[str, Any]], seen: List[set]) -> Tuple[List[Dict[str, Any]], int]:
+        kept, dropped = [], 0
+        for memory in memories:
+            shingles = _shingles(memory.get("memory") or "")
+            if not shingles or any(_similarity(shingles, other) >= self.duplicate_threshold for other in seen):
+                dropped += 1
+                continue
+            seen.append(shingles)
+            kept.append(memory)
+        return kept, dropped
+
+    def build(
+            self,
+            memories: List[Dict[str, Any]],
+            history: List[Dict[str, str]],
+            current: Dict[str, str]
+    ) -> Tuple[List[Dict[str, str]], ContextStats]:
+        current_tokens = self._message_tokens(current["content"])
+        remaining = max(0, self.budget - current_tokens)
+
+        # Newest history first, then restore chronological order
+        history_budget = int(remaining * self.history_share)
+        history_tokens, kept_history = 0, []
+        for message in reversed(history):
+            cost = self._message_tokens(message["content"])
+            if history_tokens + cost > history_budget:
+                break
+            history_tokens += cost
+            kept_history.append(message)
+        kept_history.reverse()
+        remaining -= history_tokens
+
+        # Memories that repeat the conversation add nothing
+        seen = [_shingles(message["content"]) for message in kept_history + [current]]
+        ranked = self._rank(memories)
+        unique, duplicates = self._dedupe(ranked, seen)
+
+        memory_tokens, truncated, kept_memories = 0, 0, []
+        for memory in unique:
+            content = memory["memory"]
+            if self.tokenizer.count(content) > self.max_memory_tokens:
+                content = self.tokenizer.truncate(content, self.max_memory_tokens)
+                truncated += 1
+            cost = self._message_tokens(content)
+            if memory_tokens + cost > remaining:
+                continue
+            memory_tokens += cost
+            role = (memory.get("metadata") or {}).get("message_type", "user")
+            kept_memories.append({"role": role, "content": content})
+
+        unbudgeted = current_tokens \
+            + sum(self._message_tokens(m["content"]) for m in history) \
+            + sum(self._message_tokens(m.get("memory") or "") for m in memories)
+        stats = ContextStats(
+            model=self.model,
+            budget=self.budget,
+            tokens_used=current_tokens + history_tokens + memory_tokens,
+            tokens_unbudgeted=unbudgeted,
+            current_tokens=current_tokens,
+            history_tokens=history_tokens,
+            memory_tokens=memory_tokens,
+            history_in=len(history),
+            history_kept=len(kept_history),
+            memories_in=len(memories),
+            memories_kept=len(kept_memories),
+            duplicates_dropped=duplicates,
+            truncated=truncated
+        )
+        self._record(stats)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Context assembled: %s", asdict(stats))
+
+        return kept_memories + kept_history + [current], stats
+
+    def _record(self, stats: ContextStats) -> None:
+        history_dropped = stats.history_in - stats.history_kept
+        memories_dropped = stats.memories_in - stats.memories_kept - stats.duplicates_dropped
+        self.requests += 1
+        self.tokens_used_total += stats.tokens_used
+        self.tokens_saved_total += stats.tokens_saved
+        self.history_dropped_total += history_dropped
+        self.memories_dropped_total += memories_dropped
+        self.duplicates_dropped_total += stats.duplicates_dropped
+
+        CONTEXT_TOKENS.observe(stats.tokens_used, ("used",))
+        CONTEXT_TOKENS.observe(stats.tokens_unbudgeted, ("unbudgeted",))
+        if stats.budget > 0:
+            CONTEXT_BUDGET_USED.observe(stats.tokens_used / stats.budget)
+        CONTEXT_ITEMS_DROPPED.inc(history_dropped, ("history", "budget"))
+        CONTEXT_ITEMS_DROPPED.inc(memories_dropped, ("memory", "budget"))
+        CONTEXT_ITEMS_DROPPED.inc(stats.duplicates_dropped, ("memory", "duplicate"))
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model,
+            "budget": self.budget,
+            "requests": self.requests,
+            "tokens_used_total": self.tokens_used_total,
+            "tokens_saved_total": self.tokens_saved_total,
+            "avg_tokens_used": self.tokens_used_total // self.requests if self.requests else 0,
+            "history_dropped_total": self.history_dropped_total,
+            "memories_dropped_total": self.memories_dropped_total,
+            "duplicates_dropped_total": self.duplicates_dropped_total
+        }
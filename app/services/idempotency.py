@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import logging
+from typing import TYPE_CHECKING, AsyncGenerator, AsyncIterator, List, Optional, Tuple
+
+from ..config.settings import (
+    IDEMPOTENCY_TTL_SECONDS,
+    IDEMPOTENCY_MAX_ENTRIES,
+    IDEMPOTENCY_DETACH_GRACE_SECONDS
+)
+from ..models.chat import ChatRequest
+from ..utils.cache import TTLCache
+
+if TYPE_CHECKING:
+    from .admission import AdmissionTicket
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an Idempotency-Key is reused with a different request body."""
+
+
+def request_fingerprint(request: ChatRequest) -> str:
+    return hashlib.sha256(request.model_dump_json().encode("utf-8")).hexdigest()
+
+
+class StreamRecord:
+    """The chunks of one chat stream, kept so retries can follow or replay it.
+
+    The run is driven by its own task, not by a client connection, and holds
+    its admission ticket until it ends. Whenever it has no followers, including
+    before the first one attaches, the run is cancelled once ``detach_grace``
+    seconds pass without anyone (re)attaching.
+    """
+
+    def __init__(self, fingerprint: str, detach_grace: float):
+        self.fingerprint = fingerprint
+        self.detach_grace = detach_grace
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._ticket: Optional["AdmissionTicket"] = None
+        self._detach_timer: Optional[asyncio.TimerHandle] = None
+
+    def start(self, source: AsyncIterator[str], ticket: Optional["AdmissionTicket"] = None) -> None:
+        """Drive ``source`` in a task; ``ticket`` is released when the run ends, however it ends."""
+        self._ticket = ticket
+        self._task = asyncio.create_task(self._drive(source))
+        if self.followers == 0:
+            self._arm_detach_timer()
+
+    async def _drive(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except asyncio.CancelledError as e:
+            self.error = e
+        except Exception as e:
+            logger.error(f"Idempotent chat run failed: {str(e)}")
+            self.error = e
+        finally:
+            self.done = True
+            if self._ticket is not None:
+                self._ticket.release()
+            self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncGenerator[str, None]:
+        """Yield every chunk from the start, then new ones as the run produces them."""
+        self.followers += 1
+        if self._detach_timer is not None:
+            self._detach_timer.cancel()
+            self._detach_timer = None
+        try:
+            position = 0
+            while True:
+                changed = self._changed
+                while position < len(self.chunks):
+                    yield self.chunks[position]
+                    position += 1
+                if self.done:
+                    break
+                await changed.wait()
+            if self.error is not None:
+                raise RuntimeError("Chat run did not complete") from self.error
+        finally:
+            self.followers -= 1
+            if self.followers == 0 and not self.done:
+                self._arm_detach_timer()
+
+    def _arm_detach_timer(self) -> None:
+        if self._detach_timer is not None:
+            self._detach_timer.cancel()
+        self._detach_timer = asyncio.get_running_loop().call_later(self.detach_grace, self._cancel_if_detached)
+
+    def _cancel_if_detached(self) -> None:
+        self._detach_timer = None
+        if self.followers == 0 and self._task is not None and not self._task.done():
+            logger.info("Cancelling idempotent chat run with no followers")
+            self._task.cancel()
+
+
+class IdempotencyStore:
+    """Bounded TTL store of chat streams keyed by (user id, Idempotency-Key).
+
+    Kept per worker: a retry that lands on another worker runs the request again.
+    Failed or cancelled runs are dropped so a retry starts fresh.
+    """
+
+    def __init__(
+            self,
+            ttl: float = IDEMPOTENCY_TTL_SECONDS,
+            max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+            detach_grace: float = IDEMPOTENCY_DETACH_GRACE_SECONDS
+    ):
+        self._records = TTLCache(maxsize=max_entries, ttl=ttl)
+        self.detach_grace = detach_grace
+        self.started = 0
+        self.attached = 0
+        self.replayed = 0
+
+    def get_or_create(self, user_id: int, key: str, request: ChatRequest) -> Tuple[StreamRecord, bool]:
+        """Return the record for this key and whether it was just created.
+
+        A new record must be started by the caller with ``record.start(source)``.
+        """
+        fingerprint = request_fingerprint(request)
+        cache_key = (user_id, key)
+        record = self._records.get(cache_key)
+        if record is not None and record.done and record.error is not None:
+            record = None
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+            if record.done:
+                self.replayed += 1
+            else:
+                self.attached += 1
+            return record, False
+
+        record = StreamRecord(fingerprint, self.detach_grace)
+        self._records.set(cache_key, record)
+        self.started += 1
+        return record, True
+
+    def stats(self) -> dict:
+        return {
+            **self._records.stats(),
+            "started": self.started,
+            "attached": self.attached,
+            "replayed": self.replayed
+        }
+
+
+idempotency_store = IdempotencyStore()
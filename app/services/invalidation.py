@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config.settings import INVALIDATION_BACKEND, INVALIDATION_CHANNEL
+from ..utils.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class InvalidationChannel:
+    """Fan-out of cache invalidation messages to every worker process.
+
+    Messages are small dicts with a ``kind`` key; handlers are registered per kind
+    and must be cheap and idempotent, since a publisher also receives its own messages.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+    def subscribe(self, kind: str, handler: Handler) -> None:
+        """Register a handler for messages of the given kind."""
+        if handler not in self._handlers[kind]:
+            self._handlers[kind].append(handler)
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        for handler in self._handlers.get(message.get("kind"), []):
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"Invalidation handler failed for {message.get('kind')}: {str(e)}", exc_info=True)
+
+    async def start(self) -> None:
+        """Begin receiving messages."""
+
+    async def publish(self, kind: str, **payload: Any) -> None:
+        """Send a message to all workers, including this one."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Stop receiving messages and release resources."""
+
+
+class InProcessChannel(InvalidationChannel):
+    """Channel that only reaches instances sharing the same in-process bus.
+
+    Used for single-worker deployments and tests, where several instances can stand
+    in for several workers.
+    """
+
+    _buses: Dict[str, List["InProcessChannel"]] = defaultdict(list)
+
+    def __init__(self, bus: str = INVALIDATION_CHANNEL):
+        super().__init__()
+        self.bus = bus
+
+    async def start(self) -> None:
+        members = self._buses[self.bus]
+        if self not in members:
+            members.append(self)
+
+    async def publish(self, kind: str, **payload: Any) -> None:
+        message = {"kind": kind, **payload}
+        members = self._buses.get(self.bus) or [self]
+        for member in list(members):
+            member._dispatch(message)
+
+    async def close(self) -> None:
+        members = self._buses.get(self.bus, [])
+        if self in members:
+            members.remove(self)
+
+
+class RedisChannel(InvalidationChannel):
+    """Channel backed by Redis pub/sub so every uvicorn worker sees each message."""
+
+    def __init__(self, channel: str = INVALIDATION_CHANNEL):
+        super().__init__()
+        self.channel = channel
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._redis = get_redis()
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen())
+        logger.debug("Subscribed to invalidation channel %s", self.channel)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for raw in self._pubsub.listen():
+                    try:
+                        message = json.loads(raw["data"])
+                    except (TypeError, ValueError):
+                        logger.warning("Ignoring malformed invalidation message")
+                        continue
+                    self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Invalidation listener error, resubscribing: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def publish(self, kind: str, **payload: Any) -> None:
+        message = {"kind": kind, **payload}
+        if self._redis is None:
+            # Not started yet; at least keep this worker consistent
+            self._dispatch(message)
+            return
+        try:
+            await self._redis.publish(self.channel, json.dumps(message))
+        except Exception as e:
+            logger.error(f"Failed to publish invalidation message: {str(e)}")
+            self._dispatch(message)
+
+    async def close(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._redis = None
+
+
+def create_invalidation_channel(backend: str = INVALIDATION_BACKEND) -> InvalidationChannel:
+    """Build the channel configured by INVALIDATION_BACKEND."""
+    if backend == "redis":
+        return RedisChannel()
+    if backend == "memory":
+        return InProcessChannel()
+    raise ValueError(f"Unknown invalidation backend: {backend}")
+
+
+invalidation_channel = create_invalidation_channel()
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config.settings import (
+    LOCAL_MEMORY_DIR,
+    EMBEDDING_PROVIDER,
+    EMBEDDING_MODEL,
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_BATCH_SIZE
+)
+from .memory_backends import MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+# Below this many vectors scoring is cheaper than a hop to a worker thread
+_INLINE_SEARCH_ROWS = 5000
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class Embedder:
+    """Turns texts into fixed-width vectors, batching requests where it can."""
+
+    dimensions: int
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings API, called in batches of ``batch_size`` texts."""
+
+    def __init__(
+            self,
+            model: str = EMBEDDING_MODEL,
+            dimensions: int = EMBEDDING_DIMENSIONS,
+            batch_size: int = EMBEDDING_BATCH_SIZE
+    ):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI()
+        self.model = model
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        responses = await asyncio.gather(*(
+            self.client.embeddings.create(model=self.model, input=batch, dimensions=self.dimensions)
+            for batch in batches
+        ))
+        vectors = [item.embedding for response in responses for item in response.data]
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dimensions))
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic bag-of-words feature hashing; needs no network or model files.
+
+    Much weaker than a learned embedding, but good enough for offline tests and
+    for ranking memories that share vocabulary with the query.
+    """
+
+    _TOKEN = re.compile(r"\w+")
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _embed_sync(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = self._TOKEN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                h = zlib.crc32(feature.encode())
+                vectors[row, h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+        # Sublinear term frequency so repeated words don't dominate
+        return _normalize_rows(np.sign(vectors) * np.log1p(np.abs(vectors)))
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        return self._embed_sync(texts)
+
+
+def create_embedder(provider: str = EMBEDDING_PROVIDER) -> Embedder:
+    if provider == "openai":
+        return OpenAIEmbedder()
+    if provider == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+class _UserIndex:
+    """One user's memories: an append-only float32 matrix plus a JSONL of records.
+
+    The matrix is memory-mapped read-only and re-mapped after each append, so a
+    search sees a consistent snapshot without copying the whole index into RAM.
+    """
+
+    def __init__(self, directory: str, dimensions: int):
+        self.directory = directory
+        self.dimensions = dimensions
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.records_path = os.path.join(directory, "records.jsonl")
+        self.records: List[Dict[str, Any]] = []
+        self.vectors = np.empty((0, dimensions), dtype=np.float32)
+        self.lock = asyncio.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        lines = 0
+        if os.path.exists(self.records_path):
+            with open(self.records_path, encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        self.records.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from a crash mid-append
+                        break
+        row_bytes = 4 * self.dimensions
+        vector_bytes = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+
+        # A crash between the two appends can leave one file longer than the other; cut
+        # both back to the rows they have in common, or every later append is misaligned
+        rows = min(vector_bytes // row_bytes, len(self.records))
+        if vector_bytes != rows * row_bytes:
+            logger.warning("Truncating %s from %d to %d rows", self.vectors_path, vector_bytes // row_bytes, rows)
+            os.truncate(self.vectors_path, rows * row_bytes)
+        if lines != rows:
+            logger.warning("Truncating %s from %d to %d records", self.records_path, lines, rows)
+            self.records = self.records[:rows]
+            temporary_path = self.records_path + ".tmp"
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                for record in self.records:
+                    f.write(json.dumps(record) + "\n")
+            os.replace(temporary_path, self.records_path)
+        self._remap()
+
+    def _remap(self) -> None:
+        rows = len(self.records)
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimensions)) \
+            if rows else np.empty((0, self.dimensions), dtype=np.float32)
+
+    def append(self, records: List[Dict[str, Any]], vectors: np.ndarray) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.records_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self.records.extend(records)
+        self._remap()
+
+
+def _top_k(vectors: np.ndarray, query: np.ndarray, k: int):
+    scores = vectors @ query
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return order, scores[order]
+
+
+class LocalVectorMemoryBackend(MemoryBackend):
+    """Per-user embedding index on local disk, ranked with vectorized cosine similarity.
+
+    Messages are stored verbatim (no LLM fact extraction as mem0 does) and embedded
+    in batches on write. Search is a single matrix-vector product over the user's
+    memory-mapped index, so it stays in the low milliseconds up to ~100k memories.
+    """
+
+    def __init__(self, directory: str = LOCAL_MEMORY_DIR, embedder: Optional[Embedder] = None):
+        self.directory = directory
+        self.embedder = embedder or create_embedder()
+        self._indexes: Dict[int, _UserIndex] = {}
+        self._open_lock = asyncio.Lock()
+
+    async def _index(self, user_id: int) -> _UserIndex:
+        index = self._indexes.get(user_id)
+        if index is None:
+            async with self._open_lock:
+                index = self._indexes.get(user_id)
+                if index is None:
+                    # Reading a large records file shouldn't stall the event loop
+                    index = await asyncio.to_thread(
+                        _UserIndex, os.path.join(self.directory, str(user_id)), self.embedder.dimensions
+                    )
+                    self._indexes[user_id] = index
+        return index
+
+    async def search(self, query: str, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        index = await self._index(user_id)
+        vectors, records = index.vectors, index.records
+        if len(vectors) == 0 or limit <= 0:
+            return []
+
+        query_vector = (await self.embedder.embed([query]))[0]
+        if len(vectors) > _INLINE_SEARCH_ROWS:
+            order, scores = await asyncio.to_thread(_top_k, vectors, query_vector, limit)
+        else:
+            order, scores = _top_k(vectors, query_vector, limit)
+
+        return [
+            {**records[i], "score": float(score)}
+            for i, score in zip(order.tolist(), scores.tolist())
+        ]
+
+    async def add(self, messages: List[Dict[str, str]], user_id: int, metadata: Optional[Dict[str, Any]] = None) -> None:
+        messages = [message for message in messages if message.get("content")]
+        if not messages:
+            return
+        vectors = await self.embedder.embed([message["content"] for message in messages])
+        created_at = datetime.now(timezone.utc).isoformat()
+        records = [
+            {
+                "id": uuid.uuid4().hex,
+                "memory": message["content"],
+                "metadata": {"message_type": message.get("role", "user"), **(metadata or {})},
+                "created_at": created_at
+            }
+            for message in messages
+        ]
+        index = await self._index(user_id)
+        async with index.lock:
+            await asyncio.to_thread(index.append, records, vectors)
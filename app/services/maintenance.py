@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import random
+import time
+import zlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import delete, func, select, text
+
+from ..config.database import AsyncSessionLocal, async_engine
+from ..config.settings import (
+    MAINTENANCE_ENABLED,
+    MAINTENANCE_INITIAL_DELAY_SECONDS,
+    TOKEN_PURGE_INTERVAL_SECONDS,
+    TOKEN_PURGE_BATCH_SIZE,
+    TOKEN_PURGE_MAX_BATCHES,
+    TOKEN_PURGE_BATCH_PAUSE,
+    TOKEN_PURGE_GRACE_SECONDS
+)
+from ..models.token import BlacklistedToken
+from ..utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[], Awaitable[Dict[str, Any]]]
+
+MAINTENANCE_JOB_DURATION = registry.histogram(
+    "maintenance_job_duration_seconds",
+    "Maintenance job run time, by job",
+    ("job",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+MAINTENANCE_JOB_RUNS = registry.counter(
+    "maintenance_job_runs_total",
+    "Maintenance job runs, by job and outcome (ok, error, or locked when another worker held the job)",
+    ("job", "outcome")
+)
+TOKENS_PURGED = registry.counter(
+    "revoked_tokens_purged_total",
+    "Expired rows deleted from blacklisted_tokens"
+)
+
+
+@asynccontextmanager
+async def advisory_lock(name: str) -> AsyncIterator[bool]:
+    """Try to take a cluster-wide lock for ``name``; yields whether it was acquired.
+
+    Uses a Postgres session advisory lock held on its own connection, so only one
+    worker or replica runs a job at a time. Other databases have nothing to share
+    the lock with, so it is always acquired.
+    """
+    if async_engine.dialect.name != "postgresql":
+        yield True
+        return
+
+    key = zlib.crc32(name.encode())
+    async with async_engine.connect() as connection:
+        acquired = (await connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})).scalar()
+        # The lock belongs to the session, not the transaction; don't sit idle in one
+        await connection.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                await connection.commit()
+
+
+class MaintenanceJob:
+    """A coroutine run every ``interval`` seconds, with the outcome of its runs."""
+
+    def __init__(self, name: str, func: JobFunc, interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.runs = 0
+        self.failures = 0
+        self.skipped_locked = 0
+        self.last_started_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_result: Dict[str, Any] = {}
+
+    async def run(self) -> None:
+        async with advisory_lock(f"maintenance:{self.name}") as acquired:
+            if not acquired:
+                self.skipped_locked += 1
+                MAINTENANCE_JOB_RUNS.inc(labels=(self.name, "locked"))
+                logger.debug("Skipping %s, another worker is running it", self.name)
+                return
+
+            self.last_started_at = time.time()
+            started_at = time.perf_counter()
+            try:
+                self.last_result = await self.func()
+                self.last_error = None
+                outcome = "ok"
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                outcome = "error"
+                logger.error(f"Maintenance job {self.name} failed: {str(e)}")
+            finally:
+                self.runs += 1
+                self.last_duration = time.perf_counter() - started_at
+            MAINTENANCE_JOB_DURATION.observe(self.last_duration, (self.name,))
+            MAINTENANCE_JOB_RUNS.inc(labels=(self.name, outcome))
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_locked": self.skipped_locked,
+            "last_started_at": self.last_started_at,
+            "last_duration_seconds": self.last_duration,
+            "last_error": self.last_error,
+            "last_result": self.last_result
+        }
+
+
+class MaintenanceScheduler:
+    """Runs periodic maintenance jobs in the background of every worker.
+
+    Each worker schedules every job, starting after a jittered delay; the advisory
+    lock makes all but one of them skip a run that's already in progress.
+    """
+
+    def __init__(self, enabled: bool = MAINTENANCE_ENABLED, initial_delay: float = MAINTENANCE_INITIAL_DELAY_SECONDS):
+        self.enabled = enabled
+        self.initial_delay = initial_delay
+        self.jobs: Dict[str, MaintenanceJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add_job(self, name: str, func: JobFunc, interval: float) -> MaintenanceJob:
+        job = self.jobs[name] = MaintenanceJob(name, func, interval)
+        return job
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        for name, job in self.jobs.items():
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._schedule(job))
+
+    async def _schedule(self, job: MaintenanceJob) -> None:
+        await asyncio.sleep(self.initial_delay + random.uniform(0, min(job.interval, self.initial_delay)))
+        while True:
+            try:
+                await job.run()
+            except Exception as e:
+                # Taking or releasing the lock failed; try again next interval
+                logger.error(f"Maintenance job {job.name} could not run: {str(e)}")
+            await asyncio.sleep(job.interval)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "jobs": {name: job.stats() for name, job in self.jobs.items()}
+        }
+
+
+async def blacklisted_tokens_size() -> Dict[str, Any]:
+    """Row count and on-disk size of blacklisted_tokens.
+
+    On Postgres the count is the planner's estimate, which is free; elsewhere it's
+    an exact count.
+    """
+    async with AsyncSessionLocal() as db:
+        if async_engine.dialect.name == "postgresql":
+            row = (await db.execute(text(
+                "SELECT reltuples::bigint, pg_total_relation_size(oid) FROM pg_class WHERE relname = 'blacklisted_tokens'"
+            ))).first()
+            if row is None:
+                return {"rows": 0, "bytes": 0}
+            return {"rows": max(int(row[0]), 0), "bytes": int(row[1])}
+        rows = (await db.execute(select(func.count()).select_from(BlacklistedToken))).scalar()
+        return {"rows": int(rows)}
+
+
+async def purge_expired_tokens(
+        batch_size: int = TOKEN_PURGE_BATCH_SIZE,
+        max_batches: int = TOKEN_PURGE_MAX_BATCHES,
+        pause: float = TOKEN_PURGE_BATCH_PAUSE,
+        grace: float = TOKEN_PURGE_GRACE_SECONDS
+) -> Dict[str, Any]:
+    """Delete revocations whose token has expired anyway, ``batch_size`` rows per transaction.
+
+    A token past its ``exp`` is rejected when decoded, so its row no longer
+    protects anything. Small batches keep each transaction's locks short; the
+    ``expires_at`` index keeps finding them cheap.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace)
+    expired = (
+        select(BlacklistedToken.id)
+        .where(BlacklistedToken.expires_at < cutoff)
+        .order_by(BlacklistedToken.expires_at)
+        .limit(batch_size)
+    )
+    statement = (
+        delete(BlacklistedToken)
+        .where(BlacklistedToken.id.in_(expired))
+        .execution_options(synchronize_session=False)
+    )
+
+    deleted = 0
+    batches = 0
+    complete = False
+    started_at = time.perf_counter()
+    while batches < max_batches:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(statement)
+            await db.commit()
+        batches += 1
+        deleted += result.rowcount
+        TOKENS_PURGED.inc(result.rowcount)
+        if result.rowcount < batch_size:
+            complete = True
+            break
+        await asyncio.sleep(pause)
+    elapsed = time.perf_counter() - started_at
+
+    size = await blacklisted_tokens_size()
+    logger.info(
+        "Purged %d expired revoked tokens in %d batches (%.2fs), %d rows left",
+        deleted, batches, elapsed, size["rows"]
+    )
+    return {
+        "deleted": deleted,
+        "batches": batches,
+        "complete": complete,
+        "rows_per_second": round(deleted / elapsed, 1) if elapsed > 0 else 0.0,
+        "table": size
+    }
+
+
+def create_maintenance_scheduler() -> MaintenanceScheduler:
+    scheduler = MaintenanceScheduler()
+    scheduler.add_job("purge_expired_tokens", purge_expired_tokens, TOKEN_PURGE_INTERVAL_SECONDS)
+    return scheduler
+
+
+maintenance_scheduler = create_maintenance_scheduler()
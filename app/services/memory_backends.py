@@ -0,0 +1,88 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from ..config.settings import MEM0_API_KEY, MEM0_HOST, MEMORY_BACKEND
+
+
+class MemoryBackend:
+    """Storage and semantic search of a user's conversational memories.
+
+    ``search`` returns mem0-shaped records: dicts with at least ``memory`` and
+    ``metadata`` keys, best match first.
+    """
+
+    async def search(self, query: str, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def add(self, messages: List[Dict[str, str]], user_id: int, metadata: Optional[Dict[str, Any]] = None) -> None:
+        raise NotImplementedError
+
+    async def warm_up(self) -> None:
+        """Create clients ahead of the first request."""
+
+    async def close(self) -> None:
+        pass
+
+
+class Mem0MemoryBackend(MemoryBackend):
+    """Hosted mem0 platform.
+
+    The client validates the API key with a blocking request when it's built, so
+    it's created on first use, in a worker thread, rather than at import.
+    """
+
+    def __init__(self, api_key: Optional[str] = MEM0_API_KEY, host: Optional[str] = MEM0_HOST):
+        self.api_key = api_key
+        self.host = host
+        self.client = None
+        self._client_lock = asyncio.Lock()
+
+    async def _get_client(self):
+        if self.client is None:
+            async with self._client_lock:
+                if self.client is None:
+                    from mem0 import AsyncMemoryClient
+
+                    self.client = await asyncio.to_thread(AsyncMemoryClient, api_key=self.api_key, host=self.host)
+        return self.client
+
+    async def warm_up(self) -> None:
+        await self._get_client()
+
+    async def search(self, query: str, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        client = await self._get_client()
+        return await client.search(query=query, user_id=str(user_id), limit=limit)
+
+    async def add(self, messages: List[Dict[str, str]], user_id: int, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Add messages, tagging each record with its ``message_type`` like the local backend does.
+
+        mem0 takes one metadata dict per call, so each role's messages are added separately.
+        """
+        client = await self._get_client()
+        by_role: Dict[str, List[Dict[str, str]]] = {}
+        for message in messages:
+            by_role.setdefault(message.get("role", "user"), []).append(message)
+        await asyncio.gather(*(
+            client.add(
+                messages=role_messages,
+                user_id=str(user_id),
+                metadata={"message_type": role, **(metadata or {})}
+            )
+            for role, role_messages in by_role.items()
+        ))
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.async_client.aclose()
+            self.client = None
+
+
+def create_memory_backend(backend: str = MEMORY_BACKEND) -> MemoryBackend:
+    """Build the backend configured by MEMORY_BACKEND."""
+    if backend == "mem0":
+        return Mem0MemoryBackend()
+    if backend == "local":
+        from .local_memory import LocalVectorMemoryBackend
+
+        return LocalVectorMemoryBackend()
+    raise ValueError(f"Unknown memory backend: {backend}")
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.settings import (
+    MEMORY_CACHE_BACKEND,
+    MEMORY_CACHE_TTL_SECONDS,
+    MEMORY_CACHE_MAX_BYTES
+)
+from ..utils.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+SearchResults = List[Dict[str, Any]]
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Writes the entry only if the user's generation is still the one the search started at
+_SET_IF_GENERATION_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, whitespace and trailing punctuation so near-identical follow-ups share an entry."""
+    return _WHITESPACE.sub(" ", query).strip().rstrip("?!.,;: ").lower()
+
+
+class MemorySearchCache:
+    """Cache of mem0 search results per user, query and result limit.
+
+    Implementations must treat backend failures as misses: the cache may make a
+    search faster but never make it fail.
+    """
+
+    async def get(self, user_id: int, query: str, limit: int) -> Optional[SearchResults]:
+        return None
+
+    async def generation(self, user_id: int) -> int:
+        """Marker of the user's cache state; take it before searching and pass it to ``set``."""
+        return 0
+
+    async def set(self, user_id: int, query: str, limit: int, results: SearchResults, generation: int) -> None:
+        """Store results searched for while ``generation`` was current."""
+
+    async def invalidate(self, user_id: int) -> None:
+        """Forget every cached search for a user after their memories change."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InProcessMemorySearchCache(MemorySearchCache):
+    """LRU cache bounded by a global byte budget, with a TTL on every entry.
+
+    Invalidation bumps a per-user generation that is part of the key, so stale
+    entries stop matching immediately and age out through LRU/TTL.
+    """
+
+    def __init__(self, ttl: float = MEMORY_CACHE_TTL_SECONDS, max_bytes: int = MEMORY_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, SearchResults]]" = OrderedDict()
+        self._generations: Dict[int, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, 0)
+
+    def _key(self, user_id: int, query: str, limit: int, generation: int) -> Tuple:
+        return user_id, generation, normalize_query(query), limit
+
+    def _drop(self, key: Tuple) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get(self, user_id: int, query: str, limit: int) -> Optional[SearchResults]:
+        key = self._key(user_id, query, limit, self._generations.get(user_id, 0))
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    async def set(self, user_id: int, query: str, limit: int, results: SearchResults, generation: int) -> None:
+        # The user's memories changed while this search ran; its results may predate the change
+        if generation != self._generations.get(user_id, 0):
+            return
+        size = len(json.dumps(results, default=str))
+        if size > self.max_bytes:
+            return
+        key = self._key(user_id, query, limit, generation)
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, results)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate(self, user_id: int) -> None:
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class RedisMemorySearchCache(MemorySearchCache):
+    """Shares cached searches between workers through one Redis hash per user.
+
+    Invalidation bumps the user's generation counter and deletes their hash; a
+    write only lands if the counter hasn't moved since its search started. Entry
+    age is checked on read, and the global memory cap is Redis's own
+    ``maxmemory`` with an LRU eviction policy.
+    """
+
+    def __init__(self, ttl: float = MEMORY_CACHE_TTL_SECONDS, prefix: str = "little_dragon:memsearch"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self._set_script = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _hash_key(self, user_id: int) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"{self.prefix}:{user_id}:gen"
+
+    async def generation(self, user_id: int) -> int:
+        try:
+            raw = await get_redis().get(self._generation_key(user_id))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Memory cache read failed: {str(e)}")
+            # Matches no stored generation, so the search result isn't cached
+            return -1
+        return int(raw or 0)
+
+    @staticmethod
+    def _field(query: str, limit: int) -> str:
+        digest = hashlib.sha1(normalize_query(query).encode()).hexdigest()
+        return f"{digest}:{limit}"
+
+    async def get(self, user_id: int, query: str, limit: int) -> Optional[SearchResults]:
+        try:
+            raw = await get_redis().hget(self._hash_key(user_id), self._field(query, limit))
+            if raw is not None:
+                stored_at, results = json.loads(raw)
+                if time.time() - stored_at < self.ttl:
+                    self.hits += 1
+                    return results
+        except Exception as e:
+            # Includes a corrupt entry, which is a miss like any other failure
+            self.errors += 1
+            logger.warning(f"Memory cache read failed: {str(e)}")
+        self.misses += 1
+        return None
+
+    async def set(self, user_id: int, query: str, limit: int, results: SearchResults, generation: int) -> None:
+        if generation < 0:
+            return
+        if self._set_script is None:
+            self._set_script = get_redis().register_script(_SET_IF_GENERATION_SCRIPT)
+        try:
+            await self._set_script(
+                keys=[self._hash_key(user_id), self._generation_key(user_id)],
+                args=[
+                    generation,
+                    self._field(query, limit),
+                    json.dumps([time.time(), results], default=str),
+                    max(1, int(self.ttl))
+                ]
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Memory cache write failed: {str(e)}")
+
+    async def invalidate(self, user_id: int) -> None:
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.incr(self._generation_key(user_id))
+                pipe.delete(self._hash_key(user_id))
+                await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Memory cache invalidation failed for user {user_id}: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors
+        }
+
+
+def create_memory_search_cache(backend: str = MEMORY_CACHE_BACKEND) -> MemorySearchCache:
+    """Build the cache configured by MEMORY_CACHE_BACKEND."""
+    if backend == "memory":
+        return InProcessMemorySearchCache()
+    if backend == "redis":
+        return RedisMemorySearchCache()
+    if backend == "none":
+        return MemorySearchCache()
+    raise ValueError(f"Unknown memory cache backend: {backend}")
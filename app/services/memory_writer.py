@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config.settings import (
+    MEMORY_WRITE_QUEUE_SIZE,
+    MEMORY_WRITE_BATCH_SIZE,
+    MEMORY_WRITE_FLUSH_INTERVAL,
+    MEMORY_WRITE_CONCURRENCY,
+    MEMORY_WRITE_MAX_RETRIES,
+    MEMORY_WRITE_DRAIN_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+WriteFunc = Callable[[int, List[Dict[str, str]]], Awaitable[None]]
+
+
+class MemoryWriteBehind:
+    """Background pipeline that takes memory writes off the response path.
+
+    ``submit`` never blocks: turns go onto a bounded queue and are dropped (and
+    counted) when it is full. A single flusher drains the queue in batches, either
+    when ``batch_size`` turns are waiting or ``flush_interval`` has passed, and
+    coalesces each batch into one write per user, retried with jittered backoff.
+    """
+
+    def __init__(
+            self,
+            write: WriteFunc,
+            max_queue: int = MEMORY_WRITE_QUEUE_SIZE,
+            batch_size: int = MEMORY_WRITE_BATCH_SIZE,
+            flush_interval: float = MEMORY_WRITE_FLUSH_INTERVAL,
+            concurrency: int = MEMORY_WRITE_CONCURRENCY,
+            max_retries: int = MEMORY_WRITE_MAX_RETRIES
+    ):
+        self._write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue: "asyncio.Queue[Tuple[int, List[Dict[str, str]]]]" = asyncio.Queue(maxsize=max_queue)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+
+    def submit(self, user_id: int, messages: List[Dict[str, str]]) -> bool:
+        """Queue a turn for writing; returns False if it was dropped."""
+        if self._closing:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((user_id, messages))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Memory write queue full, dropping turn for user %s", user_id)
+            return False
+        self.submitted += 1
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _next_batch(self) -> List[Tuple[int, List[Dict[str, str]]]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @staticmethod
+    def _coalesce(batch: List[Tuple[int, List[Dict[str, str]]]]) -> Dict[int, List[Dict[str, str]]]:
+        by_user: Dict[int, List[Dict[str, str]]] = {}
+        for user_id, messages in batch:
+            by_user.setdefault(user_id, []).extend(messages)
+        return by_user
+
+    async def _flush(self, batch: List[Tuple[int, List[Dict[str, str]]]]) -> None:
+        by_user = self._coalesce(batch)
+        await asyncio.gather(*(self._write_with_retry(user_id, messages) for user_id, messages in by_user.items()))
+        for _ in batch:
+            self._queue.task_done()
+
+    async def _write_with_retry(self, user_id: int, messages: List[Dict[str, str]]) -> None:
+        async with self._slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self._write(user_id, messages)
+                    self.written += 1
+                    return
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        self.failed += 1
+                        logger.error(f"Giving up on memory write for user {user_id}: {str(e)}")
+                        return
+                    self.retries += 1
+                    # Full jitter keeps retries from many workers from synchronising
+                    await asyncio.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Memory write batch failed: {str(e)}", exc_info=True)
+
+    async def drain(self, timeout: float = MEMORY_WRITE_DRAIN_TIMEOUT) -> None:
+        """Stop accepting turns and flush whatever is still queued."""
+        self._closing = True
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Memory write drain timed out with %d turns pending", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._queue.qsize(),
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries
+        }
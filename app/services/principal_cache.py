@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+
+from ..config.settings import PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_ENTRIES
+from ..models.user import User
+from ..utils.cache import TTLCache
+from .invalidation import InvalidationChannel
+from .revocation_cache import token_key
+
+logger = logging.getLogger(__name__)
+
+USER_INVALIDATED = "user_invalidated"
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Detached snapshot of the authenticated user, safe to share between requests."""
+    id: int
+    username: str
+    email: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=bool(user.is_active)
+        )
+
+
+class PrincipalCache:
+    """TTL cache of authenticated principals keyed by a digest of the bearer token.
+
+    Entries never outlive the token's ``exp``. Each keeps the token's revocation key,
+    so a hit is still checked against the revocation cache without decoding the
+    token again. Invalidating a user, which includes bumping their token version,
+    moves them to a new generation so all of their entries miss.
+    """
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_MAX_ENTRIES, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[int, int] = {}
+        self._invalidations = 0
+        self._channel: Optional[InvalidationChannel] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Tuple[Principal, bytes]]:
+        """Return the cached principal and revocation key for a token."""
+        key = token_key(token)
+        entry = self._cache.get(key)
+        if entry is not None:
+            generation, principal, revocation_key = entry
+            if generation == self._generations.get(principal.id, 0):
+                self.hits += 1
+                return principal, revocation_key
+            self._cache.pop(key)
+        self.misses += 1
+        return None
+
+    def snapshot(self) -> int:
+        """Invalidation count so far; take it before loading a user and pass it to ``put``."""
+        return self._invalidations
+
+    def put(
+            self,
+            token: str,
+            principal: Principal,
+            revocation_key: bytes,
+            expires_at: Optional[float],
+            snapshot: int
+    ) -> None:
+        """Cache a principal loaded after ``snapshot()`` returned ``snapshot``.
+
+        If the user was invalidated since then the load may predate the change
+        (a logout-all, a deactivation), so nothing is cached.
+        """
+        generation = self._generations.get(principal.id, 0)
+        if generation > snapshot:
+            return
+        ttl = None if expires_at is None else expires_at - time.time()
+        self._cache.set(token_key(token), (generation, principal, revocation_key), ttl=ttl)
+
+    def invalidate_user_local(self, user_id: int) -> None:
+        # A user's generation is the invalidation count when they were last invalidated
+        self._invalidations += 1
+        self._generations[user_id] = self._invalidations
+
+    async def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached principal for a user on all workers."""
+        self.invalidate_user_local(user_id)
+        if self._channel is not None:
+            await self._channel.publish(USER_INVALIDATED, user_id=user_id)
+
+    def _on_user_invalidated(self, message: dict) -> None:
+        self.invalidate_user_local(int(message["user_id"]))
+
+    def start(self, channel: InvalidationChannel) -> None:
+        self._channel = channel
+        channel.subscribe(USER_INVALIDATED, self._on_user_invalidated)
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache()
+_background_tasks = set()
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_changed_principal(mapper, connection, target: User) -> None:
+    """Invalidate cached principals when an ORM flush changes fields they snapshot.
+
+    Bulk ``update()`` statements bypass this hook and must call ``invalidate_user`` themselves.
+    """
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ("is_active", "email", "username", "token_version")):
+        return
+    principal_cache.invalidate_user_local(target.id)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(principal_cache.invalidate_user(target.id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..config.database import AsyncSessionLocal
+from ..config.settings import REVOCATION_CACHE_REFRESH_SECONDS
+from ..models.token import BlacklistedToken
+from .invalidation import InvalidationChannel
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REVOKED = "token_revoked"
+
+
+def token_key(token: str) -> bytes:
+    """Fixed-width key for a token so the cache doesn't hold raw JWTs."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+def revocation_key(claims: dict, token: str) -> bytes:
+    """Blacklist key for a verified token: the digest of its ``jti``.
+
+    Tokens issued before ``jti`` was added are keyed by the digest of the whole
+    token, which is what the migration backfilled their rows with.
+    """
+    jti = claims.get("jti")
+    return hashlib.sha256(jti.encode()).digest() if jti else token_key(token)
+
+
+class RevocationCache:
+    """In-memory set of revocation keys, evicted once the token would have expired anyway.
+
+    Until the cache has been loaded from ``blacklisted_tokens`` callers must fall back
+    to the database; afterwards a lookup never leaves the process.
+    """
+
+    def __init__(self, refresh_interval: int = REVOCATION_CACHE_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self.loaded = False
+        self._entries: Dict[bytes, float] = {}
+        self._expiry_heap: List[Tuple[float, bytes]] = []
+        self._channel: Optional[InvalidationChannel] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: bytes, expires_at: float) -> None:
+        """Record a revoked token until its expiry timestamp."""
+        if expires_at <= time.time():
+            return
+        if self._entries.get(key, 0) >= expires_at:
+            return
+        self._entries[key] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    def contains(self, key: bytes) -> bool:
+        """Check whether a token key is revoked, evicting expired entries first."""
+        self._evict_expired()
+        if key in self._entries:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def _evict_expired(self) -> None:
+        now = time.time()
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            # Skip stale heap entries for keys that were re-added with a later expiry
+            if self._entries.get(key) == expires_at:
+                del self._entries[key]
+
+    async def revoke(self, key: bytes, expires_at: float) -> None:
+        """Write a revocation through to this worker and broadcast it to the others."""
+        self.add(key, expires_at)
+        if self._channel is not None:
+            await self._channel.publish(TOKEN_REVOKED, key=key.hex(), expires_at=expires_at)
+
+    def _on_message(self, message: dict) -> None:
+        self.add(bytes.fromhex(message["key"]), float(message["expires_at"]))
+
+    async def load(self) -> None:
+        """Replace the cache contents with the unexpired rows of blacklisted_tokens."""
+        entries: Dict[bytes, float] = {}
+        now = time.time()
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                select(BlacklistedToken.jti_digest, BlacklistedToken.expires_at).where(
+                    BlacklistedToken.is_revoked == True,
+                    # Expired rows may not have been purged yet; the expires_at index skips them
+                    BlacklistedToken.expires_at > datetime.fromtimestamp(now, tz=timezone.utc)
+                )
+            )
+            async for key, expires_at in result:
+                expires_ts = expires_at.timestamp()
+                if expires_ts > now:
+                    entries[bytes(key)] = expires_ts
+
+        # Keep anything revoked while we were reading
+        for key, expires_ts in self._entries.items():
+            if entries.get(key, 0) < expires_ts:
+                entries[key] = expires_ts
+
+        self._entries = entries
+        self._expiry_heap = [(expires_ts, key) for key, expires_ts in entries.items()]
+        heapq.heapify(self._expiry_heap)
+        self.loaded = True
+        logger.debug("Revocation cache loaded with %d tokens", len(entries))
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to refresh revocation cache: {str(e)}")
+
+    async def start(self, channel: InvalidationChannel) -> None:
+        """Subscribe to revocations from other workers, then load from the database."""
+        self._channel = channel
+        channel.subscribe(TOKEN_REVOKED, self._on_message)
+        try:
+            await self.load()
+        except Exception as e:
+            # Lookups keep going to the database until the next refresh succeeds
+            logger.error(f"Failed to load revocation cache: {str(e)}")
+        if self.refresh_interval > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+revocation_cache = RevocationCache()
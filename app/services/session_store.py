@@ -0,0 +1,230 @@
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Tuple
+
+from ..config.settings import (
+    SESSION_BACKEND,
+    SESSION_MAX_TURNS,
+    SESSION_IDLE_TTL_SECONDS,
+    SESSION_MAX_SESSIONS,
+    SESSION_MAX_BYTES_PER_SESSION,
+    SESSION_MAX_TOTAL_BYTES
+)
+from ..utils.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Approximate cost of a message tuple and its slot on top of the strings themselves
+_MESSAGE_OVERHEAD = 64
+
+Turn = Tuple[Tuple[str, str], ...]
+
+
+def _turn_size(turn: Turn) -> int:
+    return sum(sys.getsizeof(role) + sys.getsizeof(content) + _MESSAGE_OVERHEAD for role, content in turn)
+
+
+class SessionStore:
+    """Recent conversation turns per user, oldest first.
+
+    A turn is the messages of one ``append`` call, normally a user message and the
+    assistant's reply. Turns are kept or dropped whole, so the history never
+    starts with a reply whose question was trimmed.
+    """
+
+    async def get_messages(self, user_id: int) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    async def append(self, user_id: int, messages: List[Dict[str, str]]) -> None:
+        raise NotImplementedError
+
+    async def clear(self, user_id: int) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class _Session:
+    __slots__ = ("turns", "bytes", "last_seen")
+
+    def __init__(self):
+        self.turns: Deque[Tuple[Turn, int]] = deque()
+        self.bytes = 0
+        self.last_seen = time.monotonic()
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-worker session store with LRU and idle-TTL eviction.
+
+    Each session keeps at most ``max_turns`` turns and ``max_session_bytes`` bytes,
+    dropping its oldest turns first; the store as a whole is held under
+    ``max_total_bytes`` and ``max_sessions`` by evicting least recently used sessions.
+    """
+
+    def __init__(
+            self,
+            max_turns: int = SESSION_MAX_TURNS,
+            idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+            max_sessions: int = SESSION_MAX_SESSIONS,
+            max_session_bytes: int = SESSION_MAX_BYTES_PER_SESSION,
+            max_total_bytes: int = SESSION_MAX_TOTAL_BYTES
+    ):
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        self._sessions: "OrderedDict[int, _Session]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def _evict(self) -> None:
+        # Sessions are kept in access order, so idle ones collect at the front
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            user_id, session = next(iter(self._sessions.items()))
+            if session.last_seen > cutoff and len(self._sessions) <= self.max_sessions \
+                    and self._bytes <= self.max_total_bytes:
+                break
+            self._drop(user_id)
+            self.evictions += 1
+
+    def _drop(self, user_id: int) -> None:
+        session = self._sessions.pop(user_id, None)
+        if session is not None:
+            self._bytes -= session.bytes
+
+    def _touch(self, user_id: int, create: bool = False):
+        session = self._sessions.get(user_id)
+        if session is not None and session.last_seen <= time.monotonic() - self.idle_ttl:
+            self._drop(user_id)
+            session = None
+        if session is None:
+            if not create:
+                return None
+            session = self._sessions[user_id] = _Session()
+        session.last_seen = time.monotonic()
+        self._sessions.move_to_end(user_id)
+        return session
+
+    async def get_messages(self, user_id: int) -> List[Dict[str, str]]:
+        session = self._touch(user_id)
+        if session is None:
+            return []
+        return [{"role": role, "content": content} for turn, _ in session.turns for role, content in turn]
+
+    async def append(self, user_id: int, messages: List[Dict[str, str]]) -> None:
+        session = self._touch(user_id, create=True)
+        turn = tuple((message["role"], message["content"]) for message in messages)
+        size = _turn_size(turn)
+        if turn and size <= self.max_session_bytes:
+            session.turns.append((turn, size))
+            session.bytes += size
+            self._bytes += size
+        while session.turns and (len(session.turns) > self.max_turns or session.bytes > self.max_session_bytes):
+            _, size = session.turns.popleft()
+            session.bytes -= size
+            self._bytes -= size
+        self._evict()
+
+    async def clear(self, user_id: int) -> None:
+        self._drop(user_id)
+
+    def session_bytes(self, user_id: int) -> int:
+        """Approximate memory held by one user's session."""
+        session = self._sessions.get(user_id)
+        return session.bytes if session else 0
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "max_total_bytes": self.max_total_bytes,
+            "avg_session_bytes": self._bytes // len(self._sessions) if self._sessions else 0,
+            "evictions": self.evictions
+        }
+
+
+class RedisSessionStore(SessionStore):
+    """Session store shared by all workers, one capped Redis list per user.
+
+    Each list element is one turn. Turn count is capped with LTRIM and idle
+    sessions expire with the key TTL; the global ceiling is the Redis
+    ``maxmemory`` policy.
+    """
+
+    def __init__(
+            self,
+            max_turns: int = SESSION_MAX_TURNS,
+            idle_ttl: int = SESSION_IDLE_TTL_SECONDS,
+            max_session_bytes: int = SESSION_MAX_BYTES_PER_SESSION,
+            prefix: str = "little_dragon:session"
+    ):
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_session_bytes = max_session_bytes
+        self.prefix = prefix
+        self.errors = 0
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    async def get_messages(self, user_id: int) -> List[Dict[str, str]]:
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.lrange(self._key(user_id), 0, -1)
+                pipe.expire(self._key(user_id), self.idle_ttl)
+                raw_turns, _ = await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Session read failed for user {user_id}: {str(e)}")
+            return []
+        turns = [self._decode_turn(raw) for raw in raw_turns]
+        # Keep the newest whole turns that fit the per-session byte budget
+        kept, total = [], 0
+        for turn in reversed(turns):
+            total += sum(len(content.encode()) for _, content in turn)
+            if total > self.max_session_bytes:
+                break
+            kept.append(turn)
+        return [{"role": role, "content": content} for turn in reversed(kept) for role, content in turn]
+
+    @staticmethod
+    def _decode_turn(raw: bytes) -> List[List[str]]:
+        turn = json.loads(raw)
+        # Sessions written before turns were stored whole hold one [role, content] per element
+        return [turn] if turn and isinstance(turn[0], str) else turn
+
+    async def append(self, user_id: int, messages: List[Dict[str, str]]) -> None:
+        if not messages:
+            return
+        key = self._key(user_id)
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.rpush(key, json.dumps([[m["role"], m["content"]] for m in messages]))
+                pipe.ltrim(key, -self.max_turns, -1)
+                pipe.expire(key, self.idle_ttl)
+                await pipe.execute()
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Session write failed for user {user_id}: {str(e)}")
+
+    async def clear(self, user_id: int) -> None:
+        await get_redis().delete(self._key(user_id))
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "errors": self.errors}
+
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    """Build the store configured by SESSION_BACKEND."""
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "redis":
+        return RedisSessionStore()
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -0,0 +1,153 @@
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from ..config.database import AsyncSessionLocal
+from ..config.settings import (
+    WEATHER_CACHE_TTL_SECONDS,
+    WEATHER_CACHE_MAX_ENTRIES,
+    GEOCODE_CACHE_MAX_ENTRIES,
+    GEOCODE_NEGATIVE_TTL_SECONDS
+)
+from ..models.geocode import GeocodeEntry
+from ..utils.cache import TTLCache, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[float, float]
+
+# Cached marker for locations the geocoder couldn't resolve
+_NOT_FOUND = ()
+
+# Effectively permanent; geocodes only leave memory through LRU eviction
+_GEOCODE_TTL = 10 * 365 * 86400
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_location(location: str) -> str:
+    """Fold case and spacing so "Berlin , DE" and "berlin,de" share an entry."""
+    location = _WHITESPACE.sub(" ", location.strip().casefold())
+    return ",".join(part.strip() for part in location.split(","))
+
+
+class GeocodeCache:
+    """Location name to coordinates, in memory and persisted to the geocode_cache table.
+
+    Misses fall through memory, then the table, then the geocoder; concurrent lookups
+    of the same location share one upstream call. Unknown locations are remembered
+    in memory only, for ``negative_ttl`` seconds.
+    """
+
+    def __init__(
+            self,
+            maxsize: int = GEOCODE_CACHE_MAX_ENTRIES,
+            negative_ttl: float = GEOCODE_NEGATIVE_TTL_SECONDS
+    ):
+        self._memory = TTLCache(maxsize=maxsize, ttl=_GEOCODE_TTL)
+        self._flight = SingleFlight()
+        self.negative_ttl = negative_ttl
+        self.upstream_calls = 0
+
+    async def get_or_fetch(
+            self,
+            location: str,
+            fetch: Callable[[str], Awaitable[Optional[Coordinates]]]
+    ) -> Optional[Coordinates]:
+        key = normalize_location(location)
+        cached = self._memory.get(key)
+        if cached is not None:
+            return cached or None
+        return await self._flight.do(key, lambda: self._load(key, location, fetch))
+
+    async def _load(
+            self,
+            key: str,
+            location: str,
+            fetch: Callable[[str], Awaitable[Optional[Coordinates]]]
+    ) -> Optional[Coordinates]:
+        coords = await self._read(key)
+        if coords is None:
+            self.upstream_calls += 1
+            coords = await fetch(location)
+            if coords is None:
+                self._memory.set(key, _NOT_FOUND, ttl=self.negative_ttl)
+                return None
+            await self._write(key, coords)
+        self._memory.set(key, coords)
+        return coords
+
+    async def _read(self, key: str) -> Optional[Coordinates]:
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(GeocodeEntry.lat, GeocodeEntry.lon).where(GeocodeEntry.location == key)
+                )
+                row = result.first()
+        except Exception as e:
+            logger.warning(f"Geocode cache read failed: {str(e)}")
+            return None
+        return (row.lat, row.lon) if row else None
+
+    async def _write(self, key: str, coords: Coordinates) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add(GeocodeEntry(location=key, lat=coords[0], lon=coords[1]))
+                await db.commit()
+        except IntegrityError:
+            # Another worker stored it first
+            pass
+        except Exception as e:
+            logger.warning(f"Geocode cache write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "upstream_calls": self.upstream_calls, "coalesced": self._flight.shared}
+
+
+class WeatherCache:
+    """Short-lived cache of weather responses keyed by rounded coordinates and query options."""
+
+    # Two decimals is roughly 1 km, well inside a forecast grid cell
+    PRECISION = 2
+
+    def __init__(self, maxsize: int = WEATHER_CACHE_MAX_ENTRIES, ttl: float = WEATHER_CACHE_TTL_SECONDS):
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._flight = SingleFlight()
+        self.upstream_calls = 0
+
+    @classmethod
+    def round_coordinates(cls, lat: float, lon: float) -> Coordinates:
+        return round(float(lat), cls.PRECISION), round(float(lon), cls.PRECISION)
+
+    async def get_or_fetch(
+            self,
+            lat: float,
+            lon: float,
+            exclude: str,
+            units: str,
+            lang: str,
+            fetch: Callable[[float, float, str, str, str], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        lat, lon = self.round_coordinates(lat, lon)
+        key = (lat, lon, exclude, units, lang)
+        cached = self._memory.get(key)
+        if cached is not None:
+            return cached
+        return await self._flight.do(key, lambda: self._load(key, fetch))
+
+    async def _load(self, key: tuple, fetch) -> Optional[Dict[str, Any]]:
+        self.upstream_calls += 1
+        data = await fetch(*key)
+        if data is not None:
+            self._memory.set(key, data)
+        return data
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "upstream_calls": self.upstream_calls, "coalesced": self._flight.shared}
+
+
+geocode_cache = GeocodeCache()
+weather_cache = WeatherCache()
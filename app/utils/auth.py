@@ -1,17 +1,20 @@
-from datetime import datetime, timedelta
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer
-from sqlalchemy.orm import Session
-from ..config.database import get_db
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config.database import get_async_db
 from ..config.settings import SESSION_SECRET
 from ..models.user import User
 from ..models.token import BlacklistedToken
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from ..services.principal_cache import Principal, principal_cache
+from ..services.revocation_cache import revocation_cache, revocation_key
+from .metrics import AUTH_DURATION
+from .passwords import pwd_context
 
 # Use HTTPBearer instead of OAuth2PasswordBearer to prevent auto-redirect
 security = HTTPBearer(auto_error=False)
@@ -32,39 +35,68 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # A random id to revoke the token by, so the blacklist never stores the token itself
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(16)})
     encoded_jwt = jwt.encode(to_encode, SESSION_SECRET, algorithm=ALGORITHM)
     return encoded_jwt
 
-def is_token_blacklisted(token: str, db: Session) -> bool:
-    """Check if a token is blacklisted."""
-    blacklisted_token = db.query(BlacklistedToken).filter(
-        BlacklistedToken.token == token,
-        BlacklistedToken.is_revoked == True
-    ).first()
-    return blacklisted_token is not None
+async def is_token_blacklisted(key: bytes, db: AsyncSession) -> bool:
+    """Check if a token is blacklisted, by its revocation key."""
+    if revocation_cache.loaded:
+        # Every revocation is mirrored in memory, so a miss needs no database round-trip
+        return revocation_cache.contains(key)
+
+    result = await db.execute(
+        select(BlacklistedToken.id).where(
+            BlacklistedToken.jti_digest == key,
+            BlacklistedToken.is_revoked == True
+        ).limit(1)
+    )
+    return result.first() is not None
+
+async def get_user_by_email(email: str, db: AsyncSession) -> Optional[User]:
+    """Look up a user by email."""
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def blacklist_token(token: str, db: Session) -> None:
+async def get_user_by_username(username: str, db: AsyncSession) -> Optional[User]:
+    """Look up a user by username."""
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+async def blacklist_token(token: str, db: AsyncSession) -> None:
     """Add a token to the blacklist."""
     try:
         # Decode the token to get its expiration
         payload = jwt.decode(token, SESSION_SECRET, algorithms=[ALGORITHM])
         exp_timestamp = payload.get("exp")
         if exp_timestamp:
-            expires_at = datetime.fromtimestamp(exp_timestamp)
+            # Aware, so the database can't read it in a different time zone and purge the row early
+            expires_at = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
             
             # Create a new blacklisted token record
+            key = revocation_key(payload, token)
             blacklisted_token = BlacklistedToken(
-                token=token,
+                jti_digest=key,
                 expires_at=expires_at
             )
             db.add(blacklisted_token)
-            db.commit()
+            await db.commit()
+            await revocation_cache.revoke(key, float(exp_timestamp))
     except JWTError:
         # If token is invalid, we don't need to blacklist it
         pass
 
-async def get_current_user(request: Request, token: Optional[HTTPBearer] = Depends(security), db: Session = Depends(get_db)) -> User:
+async def revoke_user_tokens(user_id: int, db: AsyncSession) -> None:
+    """Revoke every token issued to a user so far by bumping their token version."""
+    await db.execute(
+        update(User).where(User.id == user_id).values(token_version=User.token_version + 1)
+    )
+    await db.commit()
+    # A bulk update skips the after_update hook
+    await principal_cache.invalidate_user(user_id)
+
+async def get_current_user(request: Request, token: Optional[HTTPBearer] = Depends(security), db: AsyncSession = Depends(get_async_db)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -81,13 +113,24 @@ async def get_current_user(request: Request, token: Optional[HTTPBearer] = Depen
     else:
         token_str = token.credentials
 
-    # Check if token is blacklisted
-    if is_token_blacklisted(token_str, db):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    revoked_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    started_at = time.perf_counter()
+
+    # Tokens already verified within their lifetime skip the decode and user lookup
+    cached = principal_cache.get(token_str)
+    if cached is not None:
+        principal, key = cached
+        revoked = await is_token_blacklisted(key, db)
+        AUTH_DURATION.observe(time.perf_counter() - started_at, ("blacklist",))
+        if revoked:
+            raise revoked_exception
+        AUTH_DURATION.observe(time.perf_counter() - started_at, ("total_cached",))
+        return principal
 
     try:
         payload = jwt.decode(token_str, SESSION_SECRET, algorithms=[ALGORITHM])
@@ -96,14 +139,35 @@ async def get_current_user(request: Request, token: Optional[HTTPBearer] = Depen
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    decoded_at = time.perf_counter()
+    AUTH_DURATION.observe(decoded_at - started_at, ("decode",))
+
+    # The revocation key comes from the verified claims, never from an unchecked token
+    key = revocation_key(payload, token_str)
+    revoked = await is_token_blacklisted(key, db)
+    checked_at = time.perf_counter()
+    AUTH_DURATION.observe(checked_at - decoded_at, ("blacklist",))
+    if revoked:
+        raise revoked_exception
+
+    # Taken before the lookup, so a principal read before an invalidation isn't cached after it
+    snapshot = principal_cache.snapshot()
+    user = await get_user_by_email(email, db)
+    finished_at = time.perf_counter()
+    AUTH_DURATION.observe(finished_at - checked_at, ("user_lookup",))
+    if user is None or not user.is_active:
         raise credentials_exception
-    return user
+    # Tokens issued before the user's last revoke-all carry an older version
+    if payload.get("token_version", 0) != user.token_version:
+        raise revoked_exception
+
+    principal = Principal.from_user(user)
+    principal_cache.put(token_str, principal, key, payload.get("exp"), snapshot)
+    AUTH_DURATION.observe(finished_at - started_at, ("total",))
+    return principal
 
-async def get_optional_user(token: str = Depends(security), db: Session = Depends(get_db)) -> Optional[User]:
+async def get_optional_user(request: Request, token: Optional[HTTPBearer] = Depends(security), db: AsyncSession = Depends(get_async_db)) -> Optional[Principal]:
     try:
-        return await get_current_user(token, db)
+        return await get_current_user(request, token, db)
     except HTTPException:
         return None 
\ No newline at end of file
@@ -0,0 +1,118 @@
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+from ..config.settings import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_BASE_BACKOFF_SECONDS,
+    CIRCUIT_MAX_BACKOFF_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Tracks the health of one upstream endpoint.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and callers
+    should skip the endpoint. Once the backoff has elapsed a single probe request
+    is let through: success closes the breaker, failure reopens it with the
+    backoff doubled (up to ``max_backoff``).
+    """
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+            base_backoff: float = CIRCUIT_BASE_BACKOFF_SECONDS,
+            max_backoff: float = CIRCUIT_MAX_BACKOFF_SECONDS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.backoff = base_backoff
+        self.opened_at: Optional[float] = None
+        self.next_probe_at: Optional[float] = None
+        self.trips = 0
+        self.short_circuited = 0
+
+    def allow_request(self) -> bool:
+        """Whether the caller should try this endpoint now."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self.next_probe_at:
+            self.state = HALF_OPEN
+            logger.info("Circuit %s half-open, probing", self.name)
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.state != CLOSED:
+            logger.info("Circuit %s closed", self.name)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.backoff = self.base_backoff
+        self.opened_at = None
+        self.next_probe_at = None
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+            self._open()
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self.backoff = self.base_backoff
+            self._open()
+
+    def abandon_probe(self) -> None:
+        """Give up a probe that ended without an outcome, so the next request probes instead."""
+        if self.state == HALF_OPEN:
+            # next_probe_at has already passed
+            self.state = OPEN
+            logger.info("Circuit %s probe abandoned", self.name)
+
+    def _open(self) -> None:
+        now = time.monotonic()
+        self.state = OPEN
+        self.opened_at = now
+        # Jitter keeps workers from probing in lockstep
+        self.next_probe_at = now + self.backoff * random.uniform(0.9, 1.1)
+        self.trips += 1
+        logger.warning("Circuit %s open, next probe in %.1fs", self.name, self.next_probe_at - now)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "backoff_seconds": self.backoff,
+            "open_for_seconds": now - self.opened_at if self.opened_at else 0.0,
+            "next_probe_in_seconds": max(0.0, self.next_probe_at - now) if self.next_probe_at else None,
+            "trips": self.trips,
+            "short_circuited": self.short_circuited
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Return the process-wide breaker for an endpoint, creating it on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+    return breaker
+
+
+def breaker_states() -> List[dict]:
+    return [breaker.snapshot() for breaker in _breakers.values()]
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import random
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+from ..config.settings import (
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_RETRIES,
+    HTTP_RETRY_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide keep-alive client for outbound API calls, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def request_with_retry(
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+        client: Optional[httpx.AsyncClient] = None
+) -> httpx.Response:
+    """Send a request, retrying transport errors and retryable statuses with jittered backoff.
+
+    The last response is returned as-is once retries are exhausted; the last
+    transport error is raised.
+    """
+    client = client or get_http_client()
+    request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+    for attempt in range(retries + 1):
+        try:
+            response = await client.request(method, url, params=params, timeout=request_timeout)
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise
+            logger.debug("Retrying %s %s after %s", method, url, type(e).__name__)
+        else:
+            if response.status_code not in retry_statuses or attempt == retries:
+                return response
+            logger.debug("Retrying %s %s after status %d", method, url, response.status_code)
+        await asyncio.sleep(random.uniform(0, backoff * 2 ** attempt))
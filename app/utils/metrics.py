@@ -0,0 +1,246 @@
+import logging
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers sub-millisecond cache hits through multi-second model calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter. Recording is a dict lookup and an add."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, labels: LabelValues = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in list(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        # One slot per bucket plus +Inf; cumulated only when rendered
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram. ``observe`` is a bisect and two adds; bucket totals
+    are only made cumulative when the endpoint is scraped."""
+
+    kind = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _HistogramSeries(len(self.buckets) + 1)
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series.counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time, so it costs nothing in between.
+
+    The callback returns a number, or a mapping of label values to numbers.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            callback: Callable[[], Union[float, Dict[LabelValues, float]]],
+            labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} callback failed: {str(e)}")
+            return lines
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, number in values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(number)}")
+        return lines
+
+
+class CallbackCounter(CallbackGauge):
+    """Counter a component already keeps itself (cache hits, say), read at scrape time."""
+
+    kind = "counter"
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(
+            self,
+            name: str,
+            documentation: str,
+            callback: Callable[[], Union[float, Dict[LabelValues, float]]],
+            labelnames: Sequence[str] = ()
+    ) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, callback, labelnames))
+
+    def callback_counter(
+            self,
+            name: str,
+            documentation: str,
+            callback: Callable[[], Union[float, Dict[LabelValues, float]]],
+            labelnames: Sequence[str] = ()
+    ) -> CallbackCounter:
+        return self.register(CallbackCounter(name, documentation, callback, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Metrics recorded from more than one module are declared here
+AUTH_DURATION = registry.histogram(
+    "auth_duration_seconds",
+    "Time spent authenticating a request, by step",
+    ("step",)
+)
+PASSWORD_HASH_DURATION = registry.histogram(
+    "password_hash_duration_seconds",
+    "bcrypt operations in the hashing pool, split into queue wait and run time",
+    ("op", "phase"),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+MEMORY_SEARCH_DURATION = registry.histogram(
+    "memory_search_duration_seconds",
+    "Memory search latency for chat context, by outcome",
+    ("outcome",)
+)
+CHAT_TIME_TO_FIRST_TOKEN = registry.histogram(
+    "chat_time_to_first_token_seconds",
+    "Time from starting a chat response (including context assembly) to the first streamed delta"
+)
+CHAT_TOKENS_PER_SECOND = registry.histogram(
+    "chat_output_tokens_per_second",
+    "Streaming rate after the first delta; each delta is counted as one token",
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 200, 300)
+)
+CHAT_RUNS = registry.counter(
+    "chat_runs_total",
+    "Agent runs by outcome",
+    ("outcome",)
+)
+CANCELLED_TOKENS_EMITTED = registry.counter(
+    "chat_cancelled_tokens_emitted_total",
+    "Output tokens streamed by runs before they were cancelled"
+)
+TOOL_CALL_DURATION = registry.histogram(
+    "tool_call_duration_seconds",
+    "Ability call latency, by tool and outcome",
+    ("tool", "outcome")
+)
+DB_POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
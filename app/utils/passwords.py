@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from ..config.settings import (
+    BCRYPT_ROUNDS,
+    PASSWORD_POOL_WORKERS,
+    PASSWORD_POOL_QUEUE,
+    PASSWORD_POOL_QUEUE_TIMEOUT
+)
+from .metrics import PASSWORD_HASH_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Password hashing; min_rounds makes hashes below the current cost count as stale,
+# so verify_and_update() rehashes them at login after BCRYPT_ROUNDS is raised
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS
+)
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, returning a fresh hash if the stored one uses stale parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _ping() -> None:
+    """No-op used to start worker processes."""
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing pool's admission queue is full or the wait times out."""
+
+
+class OperationTimings:
+    """Per-operation counts and cumulative queue/run time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops: Dict[str, Dict[str, float]] = {}
+
+    def record(self, op: str, wait: float, run: float) -> None:
+        with self._lock:
+            stats = self._ops.setdefault(op, {"count": 0, "wait_seconds": 0.0, "run_seconds": 0.0, "max_run_seconds": 0.0})
+            stats["count"] += 1
+            stats["wait_seconds"] += wait
+            stats["run_seconds"] += run
+            stats["max_run_seconds"] = max(stats["max_run_seconds"], run)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {op: dict(stats) for op, stats in self._ops.items()}
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated process pool so it never blocks the event loop.
+
+    At most ``max_workers`` operations run at once and at most ``max_queue`` wait for a
+    worker; anything beyond that is rejected with PasswordPoolBusy instead of piling up.
+    """
+
+    def __init__(
+            self,
+            max_workers: int = PASSWORD_POOL_WORKERS,
+            max_queue: int = PASSWORD_POOL_QUEUE,
+            queue_timeout: float = PASSWORD_POOL_QUEUE_TIMEOUT
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.timings = OperationTimings()
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(max_workers)
+        self._waiting = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers don't inherit the event loop, sockets or DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.debug("Password hashing pool started with %d workers", self.max_workers)
+        return self._executor
+
+    async def _run(self, op: str, func, *args):
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordPoolBusy("Password hashing queue is full")
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise PasswordPoolBusy("Timed out waiting for a password hashing worker")
+        finally:
+            self._waiting -= 1
+
+        started_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._slots.release()
+            finished_at = time.perf_counter()
+            self.timings.record(op, started_at - queued_at, finished_at - started_at)
+            PASSWORD_HASH_DURATION.observe(started_at - queued_at, (op, "queue"))
+            PASSWORD_HASH_DURATION.observe(finished_at - started_at, (op, "run"))
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run("verify", verify_and_update_password, plain_password, hashed_password)
+
+    def warm_up(self) -> None:
+        """Start the worker processes ahead of the first login."""
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(_ping)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "waiting": self._waiting,
+            "rejected": self.rejected,
+            "operations": self.timings.snapshot()
+        }
+
+
+password_hasher = PasswordHasher()
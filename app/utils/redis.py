@@ -0,0 +1,20 @@
+from ..config.settings import REDIS_URL
+
+_client = None
+
+
+def get_redis():
+    """Return the process-wide asyncio Redis client, creating it on first use."""
+    global _client
+    if _client is None:
+        import redis.asyncio as redis
+
+        _client = redis.from_url(REDIS_URL)
+    return _client
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
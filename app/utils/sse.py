@@ -0,0 +1,128 @@
+import asyncio
+import re
+from typing import AsyncGenerator, AsyncIterable
+
+import anyio
+from starlette.responses import StreamingResponse
+from starlette.types import Send
+
+from ..config.settings import SSE_FLUSH_INTERVAL, SSE_FLUSH_BYTES, SSE_HEARTBEAT_SECONDS
+
+HEARTBEAT = b": ping\n\n"
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+_DONE = object()
+
+
+def format_event(data: str) -> bytes:
+    """Encode text as one SSE event, one ``data:`` line per line of text.
+
+    Clients join the data lines of an event with "\\n", so newlines in the
+    text survive instead of ending the event early.
+    """
+    lines = _LINE_BREAK.split(data)
+    return ("data: " + "\ndata: ".join(lines) + "\n\n").encode("utf-8")
+
+
+async def sse_stream(
+        chunks: AsyncIterable[str],
+        flush_interval: float = SSE_FLUSH_INTERVAL,
+        flush_bytes: int = SSE_FLUSH_BYTES,
+        heartbeat_interval: float = SSE_HEARTBEAT_SECONDS
+) -> AsyncGenerator[bytes, None]:
+    """Frame text chunks as SSE events, batching chunks that arrive close together.
+
+    The first chunk is sent as soon as it arrives. After that, chunks are joined
+    into one event until ``flush_interval`` seconds have passed since the batch
+    started or it holds ``flush_bytes`` characters. While nothing arrives for
+    ``heartbeat_interval`` seconds a comment frame is sent instead; an interval
+    of 0 or less sends no heartbeats.
+
+    The source is read by a separate task, so it keeps producing while a frame
+    is being written; closing this generator cancels the task and waits for it.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    queue.put_nowait(chunk)
+        finally:
+            queue.put_nowait(_DONE)
+
+    loop = asyncio.get_running_loop()
+    idle_timeout = heartbeat_interval if heartbeat_interval > 0 else None
+    reader = asyncio.ensure_future(pump())
+    try:
+        coalesce = False
+        done = False
+        while not done:
+            try:
+                item = await asyncio.wait_for(queue.get(), idle_timeout)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            if item is _DONE:
+                break
+
+            parts = [item]
+            size = len(item)
+            deadline = loop.time() + flush_interval if coalesce else 0.0
+            while size < flush_bytes:
+                if queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = queue.get_nowait()
+                if item is _DONE:
+                    done = True
+                    break
+                parts.append(item)
+                size += len(item)
+
+            coalesce = flush_interval > 0
+            yield format_event("".join(parts))
+
+        # Surface an error raised by the source
+        await reader
+    finally:
+        if not reader.done():
+            reader.cancel()
+            # Wait for the source to be closed, so the run has stopped when this returns
+            try:
+                await reader
+            except asyncio.CancelledError:
+                # Only the reader's own cancellation is expected here
+                if asyncio.current_task().cancelling():
+                    raise
+
+
+class SSEResponse(StreamingResponse):
+    """Event-stream response that closes its body iterator as soon as streaming stops.
+
+    Starlette leaves the iterator to be finalized by the garbage collector when a
+    write to a disconnected client fails, so cleanup in the generator (cancelling
+    the agent run) could happen arbitrarily late. Closing it here runs that
+    cleanup immediately on every exit path.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, content: AsyncIterable[bytes], **kwargs):
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(kwargs.pop("headers", None) or {})}
+        super().__init__(content, headers=headers, **kwargs)
+
+    async def stream_response(self, send: Send) -> None:
+        try:
+            await super().stream_response(send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                with anyio.CancelScope(shield=True):
+                    await aclose()
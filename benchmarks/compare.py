@@ -0,0 +1,76 @@
+"""Compare two benchmark result files written by ``benchmarks.run``.
+
+Prints the change in throughput and latency percentiles per operation and
+exits non-zero when any latency percentile got worse, or throughput dropped,
+by more than ``--threshold`` (a fraction; 0.1 = 10%).
+
+Usage::
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional, Tuple
+
+PERCENTILES = ("p50", "p95", "p99")
+
+
+def _change(before: float, after: float) -> Optional[float]:
+    if not before:
+        return None
+    return (after - before) / before
+
+
+def _format_change(change: Optional[float]) -> str:
+    return "   n/a" if change is None else f"{change * 100:+6.1f}%"
+
+
+def compare(before: dict, after: dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Return the report lines and a description of each regression."""
+    lines = [f"{before['commit']} -> {after['commit']}"]
+    regressions = []
+
+    rows = [("total", "req/s", before["rps"], after["rps"], True)]
+    for op, stats in after["operations"].items():
+        old = before["operations"].get(op)
+        if old is None:
+            continue
+        rows.append((op, "req/s", old["rps"], stats["rps"], True))
+        for percentile in PERCENTILES:
+            rows.append((op, f"{percentile} ms", old["latency_ms"][percentile], stats["latency_ms"][percentile], False))
+    for label, key in (("chat TTFT", "chat_ttft_ms"), ("loop lag", "event_loop_lag_ms")):
+        for percentile in PERCENTILES:
+            rows.append((label, f"{percentile} ms", before[key][percentile], after[key][percentile], False))
+
+    for name, metric, old, new, higher_is_better in rows:
+        change = _change(old, new)
+        worse = change is not None and (-change if higher_is_better else change) > threshold
+        marker = "  REGRESSION" if worse else ""
+        lines.append(f"{name:<10} {metric:<7} {old:>10.2f} {new:>10.2f} {_format_change(change)}{marker}")
+        if worse:
+            regressions.append(f"{name} {metric} {_format_change(change).strip()}")
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    lines, regressions = compare(before, after, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
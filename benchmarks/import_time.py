@@ -0,0 +1,88 @@
+"""Measure how long ``import main`` takes in a fresh interpreter.
+
+Runs the import ``--runs`` times, each in a new process, and prints the
+median and worst wall-clock time along with the slowest top-level modules
+from ``python -X importtime``. Exits non-zero when the median is above
+``--max-seconds``, so it can guard startup time in CI.
+
+Importing the app should stay cheap and offline: clients, the agents SDK
+and abilities are built by the lifespan warm-up, not at import.
+
+Usage::
+
+    python -m benchmarks.import_time --runs 5 --max-seconds 1.5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded during warm-up; importing main shouldn't pull them in
+HEAVY_MODULES = ("agents", "openai", "mem0", "tiktoken")
+
+_TIMED_IMPORT = (
+    "import sys, time; started = time.perf_counter(); import main; print(time.perf_counter() - started); "
+    f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+)
+
+
+def measure_once() -> Tuple[float, List[str], str]:
+    """Import time in seconds, heavy modules loaded and the ``-X importtime`` report, from one fresh process."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", _TIMED_IMPORT],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    seconds, heavy = result.stdout.splitlines()[-2:]
+    return float(seconds), [name for name in heavy.split(",") if name], result.stderr
+
+
+def slowest_modules(report: str, limit: int) -> List[Tuple[str, float]]:
+    """Cumulative import time in milliseconds of the slowest modules imported directly by ``main``."""
+    modules = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Two spaces of indent mark a direct import of main
+        if name.startswith("   ") and not name.startswith("    ") and cumulative.strip().isdigit():
+            modules.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda module: module[1], reverse=True)[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the import time of main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports to list")
+    parser.add_argument("--max-seconds", type=float, help="Fail when the median import time is above this")
+    args = parser.parse_args()
+
+    timings, heavy, report = [], [], ""
+    for _ in range(args.runs):
+        seconds, heavy, report = measure_once()
+        timings.append(seconds)
+
+    median = statistics.median(timings)
+    print(f"import main: median {median:.3f}s  max {max(timings):.3f}s  over {args.runs} runs")
+    for name, milliseconds in slowest_modules(report, args.top):
+        print(f"  {milliseconds:8.1f} ms  {name}")
+
+    if heavy:
+        print(f"warning: importing main also imports {', '.join(heavy)}")
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"median import time {median:.3f}s is above the {args.max_seconds:.3f}s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
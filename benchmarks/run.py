@@ -0,0 +1,311 @@
+"""Load-test the API against local upstream stubs and save the results as JSON.
+
+Starts ``benchmarks.stubs`` (OpenAI, mem0 and OpenWeather stand-ins) and
+``benchmarks.server`` (``main.app`` on SQLite, or the database given with
+``--database-url``) as subprocesses, registers a pool of users, then drives a
+weighted mix of register, login and chat requests from ``--concurrency``
+clients for ``--duration`` seconds after a warm-up.
+
+Reported per operation: requests/s, errors and p50/p95/p99 latency; for chat
+also time to first SSE frame; for the server, event-loop lag. Results are
+written to ``--output`` as ``<timestamp>-<commit>.json``; compare two runs
+with ``python -m benchmarks.compare``.
+
+Usage (from the repository root)::
+
+    pip install -r requirements.txt -r benchmarks/requirements.txt
+    python -m benchmarks.run --duration 30 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from .stats import summarize
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHAT_PROMPTS = [
+    "Can you help me plan my week?",
+    "Summarize what we talked about yesterday",
+    "What's a good recipe for dinner tonight?",
+    "What's the weather like in Berlin today?",
+    "Remind me what my favourite book was",
+]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("chat", "login", "register"):
+            raise argparse.ArgumentTypeError(f"Unknown operation in mix: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class Recorder:
+    """Collects per-operation latencies while recording is switched on."""
+
+    def __init__(self):
+        self.recording = False
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.ttft: List[float] = []
+
+    def record(self, op: str, seconds: float, status: int, ok: bool, ttft: Optional[float] = None) -> None:
+        if not self.recording:
+            return
+        self.statuses[op][status] += 1
+        if not ok:
+            self.errors[op] += 1
+            return
+        self.latencies[op].append(seconds * 1000)
+        if ttft is not None:
+            self.ttft.append(ttft * 1000)
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, base_url: str):
+        self.args = args
+        self.base_url = base_url
+        self.recorder = Recorder()
+        self.users: List[dict] = []
+        self.ops = list(args.mix)
+        self.weights = [args.mix[op] for op in self.ops]
+
+    async def register(self, client: httpx.AsyncClient) -> Optional[dict]:
+        name = uuid.uuid4().hex[:12]
+        user = {"username": f"bench_{name}", "email": f"{name}@example.com", "password": "bench-password"}
+        started = time.perf_counter()
+        response = await client.post("/auth/register", json=user)
+        self.recorder.record("register", time.perf_counter() - started, response.status_code, response.status_code == 200)
+        return user if response.status_code == 200 else None
+
+    async def login(self, client: httpx.AsyncClient, user: dict) -> Optional[str]:
+        started = time.perf_counter()
+        response = await client.post("/auth/login", json={"email": user["email"], "password": user["password"]})
+        ok = response.status_code == 200
+        self.recorder.record("login", time.perf_counter() - started, response.status_code, ok)
+        return response.json().get("access_token") if ok else None
+
+    async def chat(self, client: httpx.AsyncClient, user: dict) -> None:
+        body = {"message": {"role": "user", "content": random.choice(CHAT_PROMPTS)}}
+        headers = {"Authorization": f"Bearer {user['token']}"}
+        started = time.perf_counter()
+        ttft = None
+        async with client.stream("POST", "/api/chat", json=body, headers=headers) as response:
+            if response.status_code == 200:
+                async for line in response.aiter_lines():
+                    if ttft is None and line.startswith("data:"):
+                        ttft = time.perf_counter() - started
+            else:
+                await response.aread()
+        ok = response.status_code == 200 and ttft is not None
+        self.recorder.record("chat", time.perf_counter() - started, response.status_code, ok, ttft)
+
+    async def setup_users(self, client: httpx.AsyncClient) -> None:
+        semaphore = asyncio.Semaphore(8)
+
+        async def create():
+            async with semaphore:
+                user = await self.register(client)
+                if user is not None:
+                    user["token"] = await self.login(client, user)
+                    if user["token"]:
+                        self.users.append(user)
+
+        await asyncio.gather(*(create() for _ in range(self.args.users)))
+        if not self.users:
+            raise RuntimeError("Could not register any benchmark users")
+
+    async def worker(self, client: httpx.AsyncClient, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            op = random.choices(self.ops, self.weights)[0]
+            try:
+                if op == "register":
+                    await self.register(client)
+                elif op == "login":
+                    await self.login(client, random.choice(self.users))
+                else:
+                    await self.chat(client, random.choice(self.users))
+            except httpx.HTTPError:
+                self.recorder.record(op, 0.0, 0, False)
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=self.args.concurrency + 8)
+        timeout = httpx.Timeout(60.0)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=timeout) as client:
+            await self.setup_users(client)
+
+            # Warm-up traffic fills caches and pools but isn't recorded
+            await asyncio.gather(*(
+                self.worker(client, time.perf_counter() + self.args.warmup) for _ in range(self.args.concurrency)
+            ))
+
+            await client.get("/bench/loop-lag", params={"reset": "true"})
+            self.recorder.recording = True
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                self.worker(client, started + self.args.duration) for _ in range(self.args.concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+            self.recorder.recording = False
+            loop_lag = (await client.get("/bench/loop-lag")).json()
+
+        return self.report(elapsed, loop_lag)
+
+    def report(self, elapsed: float, loop_lag: dict) -> dict:
+        recorder = self.recorder
+        operations = {}
+        total = 0
+        for op in self.ops:
+            completed = len(recorder.latencies[op])
+            total += completed
+            operations[op] = {
+                "completed": completed,
+                "errors": recorder.errors[op],
+                "statuses": {str(code): count for code, count in sorted(recorder.statuses[op].items())},
+                "rps": completed / elapsed,
+                "latency_ms": summarize(recorder.latencies[op])
+            }
+        return {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {key: value for key, value in vars(self.args).items() if key != "output"},
+            "duration_s": elapsed,
+            "rps": total / elapsed,
+            "operations": operations,
+            "chat_ttft_ms": summarize(recorder.ttft),
+            "event_loop_lag_ms": loop_lag
+        }
+
+
+def server_environment(args: argparse.Namespace, workdir: str) -> Dict[str, str]:
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{workdir}/bench.db",
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{stub_url}/v1",
+        "OPENAI_AGENTS_DISABLE_TRACING": "1",
+        "MEM0_API_KEY": "bench",
+        "MEM0_HOST": stub_url,
+        "MEM0_TELEMETRY": "False",
+        "OPENWEATHER_API_KEY": "bench",
+        "OPENWEATHER_BASE_URL": stub_url,
+        "MEMORY_BACKEND": args.memory_backend,
+        "LOCAL_MEMORY_DIR": f"{workdir}/memory",
+        "EMBEDDING_PROVIDER": "hashing",
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "LOG_LEVEL": "WARNING",
+    })
+    if args.database_url:
+        # The async URL is derived from DATABASE_URL
+        env.pop("ASYNC_DATABASE_URL", None)
+    else:
+        env["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{workdir}/bench.db"
+    return env
+
+
+async def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def print_summary(results: dict) -> None:
+    print(f"commit {results['commit']}  {results['duration_s']:.1f}s  {results['rps']:.1f} req/s")
+    print(f"{'operation':<10} {'req/s':>8} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for op, stats in results["operations"].items():
+        latency = stats["latency_ms"]
+        print(f"{op:<10} {stats['rps']:>8.1f} {stats['errors']:>7} {latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f}")
+    ttft = results["chat_ttft_ms"]
+    lag = results["event_loop_lag_ms"]
+    print(f"chat TTFT ms     p50 {ttft['p50']:.1f}  p95 {ttft['p95']:.1f}  p99 {ttft['p99']:.1f}")
+    print(f"loop lag ms      p50 {lag['p50']:.2f}  p95 {lag['p95']:.2f}  p99 {lag['p99']:.2f}  max {lag['max']:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the API against local upstream stubs")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unrecorded seconds before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--users", type=int, default=32, help="Users registered up front for login and chat")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("chat=0.7,login=0.25,register=0.05"))
+    parser.add_argument("--memory-backend", choices=["mem0", "local"], default="mem0")
+    parser.add_argument("--database-url", help="Sync database URL, e.g. a local Postgres; defaults to SQLite")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Stub seconds between streamed tokens")
+    parser.add_argument("--first-token-delay", type=float, default=0.15, help="Stub seconds before the first token")
+    parser.add_argument("--app-port", type=int, default=18300)
+    parser.add_argument("--stub-port", type=int, default=18200)
+    parser.add_argument("--output", default=str(ROOT / "benchmarks" / "results"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        stubs = subprocess.Popen([
+            sys.executable, "-m", "benchmarks.stubs",
+            "--port", str(args.stub_port),
+            "--reply-tokens", str(args.reply_tokens),
+            "--token-delay", str(args.token_delay),
+            "--first-token-delay", str(args.first_token_delay)
+        ], cwd=ROOT)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.server", "--port", str(args.app_port)],
+            cwd=ROOT,
+            env=server_environment(args, workdir)
+        )
+        try:
+            asyncio.run(wait_until_ready(f"http://127.0.0.1:{args.stub_port}/v1/ping/", stubs))
+            asyncio.run(wait_until_ready(f"http://127.0.0.1:{args.app_port}/ops/health/ready", server))
+            results = asyncio.run(LoadTest(args, f"http://127.0.0.1:{args.app_port}").run())
+        finally:
+            for process in (server, stubs):
+                process.terminate()
+            for process in (server, stubs):
+                try:
+                    process.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{results['commit']}.json"
+    path.write_text(json.dumps(results, indent=2))
+    print_summary(results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
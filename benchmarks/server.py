@@ -0,0 +1,67 @@
+"""Serve ``main.app`` for a benchmark run, with an event-loop lag probe.
+
+Configuration comes from the environment set up by ``benchmarks.run``. Tables
+are created directly from the models, so an empty SQLite file or Postgres
+database works. ``GET /bench/loop-lag`` reports how late the event loop woke
+up a sleeping probe task, in milliseconds; ``?reset=true`` starts a new window.
+"""
+import argparse
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+from .stats import summarize
+
+PROBE_INTERVAL = 0.01
+
+_lag_samples = deque(maxlen=100_000)
+
+
+async def _probe_loop_lag() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        _lag_samples.append(max(0.0, loop.time() - started - PROBE_INTERVAL) * 1000)
+
+
+def create_app():
+    import main
+    from app.config.database import Base, engine
+    from app.models import geocode, token, user  # noqa: F401 - register the tables
+
+    Base.metadata.create_all(engine)
+
+    app_lifespan = main.app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        probe = asyncio.create_task(_probe_loop_lag())
+        try:
+            async with app_lifespan(app) as state:
+                yield state
+        finally:
+            probe.cancel()
+
+    async def loop_lag(reset: bool = False):
+        samples = list(_lag_samples)
+        if reset:
+            _lag_samples.clear()
+        return summarize(samples)
+
+    main.app.router.lifespan_context = lifespan
+    main.app.add_api_route("/bench/loop-lag", loop_lag, methods=["GET"])
+    return main.app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the API for benchmarking")
+    parser.add_argument("--port", type=int, default=18300)
+    args = parser.parse_args()
+    uvicorn.run(create_app(), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
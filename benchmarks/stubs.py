@@ -0,0 +1,200 @@
+"""Local stand-ins for the upstream APIs the service calls.
+
+One FastAPI app serves all three, so a benchmark run needs no network access:
+
+- OpenAI Responses API (``POST /v1/responses``), streaming a fixed-length reply
+  at a configurable token rate. Prompts that mention the weather first get a
+  ``check_weather`` function call, so the tool path is exercised too.
+- mem0 platform API (``/v1/ping/``, ``/v1/memories/``, ``/v1/memories/search/``).
+- OpenWeather (geocoding, One Call 3.0 and the 2.5 fallback).
+
+Run standalone with ``python -m benchmarks.stubs --port 18200``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Tunable from the command line
+config = {
+    "reply_tokens": 60,
+    "token_delay": 0.005,
+    "first_token_delay": 0.15,
+    "mem0_delay": 0.03,
+    "weather_delay": 0.05,
+    "onecall_available": False,
+}
+
+app = FastAPI()
+
+_WORDS = "the quick brown fox jumps over a lazy dog while little dragons answer questions".split()
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def _usage(input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "input_tokens": input_tokens,
+        "input_tokens_details": {"cached_tokens": 0},
+        "output_tokens": output_tokens,
+        "output_tokens_details": {"reasoning_tokens": 0},
+        "total_tokens": input_tokens + output_tokens
+    }
+
+
+def _response(body: dict, output: list, status: str, usage: dict = None) -> dict:
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "status": status,
+        "output": output,
+        "parallel_tool_calls": bool(body.get("parallel_tool_calls", False)),
+        "tool_choice": body.get("tool_choice") or "auto",
+        "tools": body.get("tools") or [],
+        "usage": usage
+    }
+
+
+def _wants_tool(body: dict) -> bool:
+    items = body.get("input") or []
+    if isinstance(items, str) or not body.get("tools"):
+        return False
+    if any(item.get("type") == "function_call_output" for item in items):
+        return False
+    last = items[-1] if items else {}
+    content = last.get("content")
+    return last.get("role") == "user" and isinstance(content, str) and "weather" in content.lower()
+
+
+async def _stream_tool_call(body: dict):
+    await asyncio.sleep(config["first_token_delay"])
+    call = {
+        "type": "function_call",
+        "id": f"fc_{uuid.uuid4().hex}",
+        "call_id": f"call_{uuid.uuid4().hex}",
+        "name": "check_weather",
+        "arguments": json.dumps({"location": random.choice(["Berlin", "Paris", "Tokyo", "Lima"])}),
+        "status": "completed"
+    }
+    yield _sse({"type": "response.created", "response": _response(body, [], "in_progress")})
+    yield _sse({"type": "response.completed", "response": _response(body, [call], "completed", _usage(200, 20))})
+
+
+async def _stream_text(body: dict):
+    item_id = f"msg_{uuid.uuid4().hex}"
+    yield _sse({"type": "response.created", "response": _response(body, [], "in_progress")})
+    await asyncio.sleep(config["first_token_delay"])
+    words = []
+    for index in range(config["reply_tokens"]):
+        word = _WORDS[index % len(_WORDS)] + " "
+        words.append(word)
+        yield _sse({
+            "type": "response.output_text.delta",
+            "item_id": item_id,
+            "output_index": 0,
+            "content_index": 0,
+            "delta": word
+        })
+        await asyncio.sleep(config["token_delay"])
+    message = {
+        "type": "message",
+        "id": item_id,
+        "role": "assistant",
+        "status": "completed",
+        "content": [{"type": "output_text", "text": "".join(words), "annotations": []}]
+    }
+    yield _sse({
+        "type": "response.completed",
+        "response": _response(body, [message], "completed", _usage(500, config["reply_tokens"]))
+    })
+
+
+@app.post("/v1/responses")
+async def responses(request: Request):
+    body = await request.json()
+    stream = _stream_tool_call(body) if _wants_tool(body) else _stream_text(body)
+    return StreamingResponse(stream, media_type="text/event-stream")
+
+
+@app.get("/v1/ping/")
+async def mem0_ping():
+    return {"status": "ok", "org_id": "bench", "project_id": "bench", "user_email": "bench@example.com"}
+
+
+@app.post("/v1/memories/search/")
+async def mem0_search(request: Request):
+    body = await request.json()
+    await asyncio.sleep(config["mem0_delay"])
+    return [
+        {
+            "id": str(index),
+            "memory": f"User mentioned {random.choice(_WORDS)} and {random.choice(_WORDS)} earlier",
+            "score": 1.0 - index * 0.1,
+            "metadata": {"message_type": "user"},
+            "created_at": "2025-01-01T00:00:00Z"
+        }
+        for index in range(min(int(body.get("limit", 10)), 5))
+    ]
+
+
+@app.post("/v1/memories/")
+async def mem0_add(request: Request):
+    await request.body()
+    await asyncio.sleep(config["mem0_delay"])
+    return [{"id": uuid.uuid4().hex, "event": "ADD"}]
+
+
+@app.get("/geo/1.0/direct")
+async def geocode(q: str):
+    await asyncio.sleep(config["weather_delay"])
+    return [{"name": q, "lat": round(random.uniform(-60, 60), 4), "lon": round(random.uniform(-180, 180), 4)}]
+
+
+@app.get("/data/3.0/onecall")
+async def onecall(lat: float, lon: float):
+    await asyncio.sleep(config["weather_delay"])
+    if not config["onecall_available"]:
+        return JSONResponse({"cod": 401, "message": "Please subscribe to One Call 3.0"}, status_code=401)
+    return {"lat": lat, "lon": lon, "current": {"temp": 21.5, "weather": [{"description": "clear sky"}]}}
+
+
+@app.get("/data/2.5/weather")
+async def weather(lat: float, lon: float):
+    await asyncio.sleep(config["weather_delay"])
+    return {"coord": {"lat": lat, "lon": lon}, "main": {"temp": 21.5}, "weather": [{"description": "clear sky"}]}
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for OpenAI, mem0 and OpenWeather")
+    parser.add_argument("--port", type=int, default=18200)
+    parser.add_argument("--reply-tokens", type=int, default=config["reply_tokens"])
+    parser.add_argument("--token-delay", type=float, default=config["token_delay"])
+    parser.add_argument("--first-token-delay", type=float, default=config["first_token_delay"])
+    parser.add_argument("--mem0-delay", type=float, default=config["mem0_delay"])
+    parser.add_argument("--weather-delay", type=float, default=config["weather_delay"])
+    parser.add_argument("--onecall-available", action="store_true")
+    args = parser.parse_args()
+    config.update(
+        reply_tokens=args.reply_tokens,
+        token_delay=args.token_delay,
+        first_token_delay=args.first_token_delay,
+        mem0_delay=args.mem0_delay,
+        weather_delay=args.weather_delay,
+        onecall_available=args.onecall_available
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
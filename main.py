@@ -1,21 +1,53 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-import os
-from app.routes import chat, auth
-from app.config.settings import API_TITLE, CORS_ORIGINS
+from app.routes import chat, auth, ops
+from app.config.logging_config import RequestLoggingMiddleware, configure_logging, stop_logging
+from app.config.settings import API_TITLE, CORS_ORIGINS, LOG_LEVEL
+from app.services.container import services
+from app.services.invalidation import invalidation_channel
+from app.services.maintenance import maintenance_scheduler
+from app.services.principal_cache import principal_cache
+from app.services.revocation_cache import revocation_cache
+from app.utils.passwords import password_hasher
+from app.utils.http import close_http_client
+from app.utils.redis import close_redis
 
 # Configure logging
-log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(
-    level=getattr(logging, log_level),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 
 logger = logging.getLogger(__name__)
-logger.debug("Starting application with log level: %s", log_level)
+logger.debug("Starting application with log level: %s", LOG_LEVEL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.debug("Application startup")
+    logger.debug("CORS origins: %s", CORS_ORIGINS)
+    await invalidation_channel.start()
+    principal_cache.start(invalidation_channel)
+    await revocation_cache.start(invalidation_channel)
+    password_hasher.warm_up()
+    # Clients, the agent and abilities are built in the background; /ops/health/ready reports when they are
+    services.start()
+    maintenance_scheduler.start()
+
+    yield
+
+    logger.debug("Application shutdown")
+    await maintenance_scheduler.stop()
+    await revocation_cache.stop()
+    await invalidation_channel.close()
+    password_hasher.shutdown()
+    await services.close()
+    await close_redis()
+    await close_http_client()
+    stop_logging()
+
 
-app = FastAPI(title=API_TITLE)
+app = FastAPI(title=API_TITLE, lifespan=lifespan)
 
 # Configure CORS with more detailed settings
 app.add_middleware(
@@ -29,33 +61,15 @@ app.add_middleware(
 )
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.debug("Incoming request: %s %s", request.method, request.url)
-    logger.debug("Request headers: %s", dict(request.headers))
-
-    response = await call_next(request)
-
-    logger.debug("Response status: %d", response.status_code)
-    logger.debug("Response headers: %s", dict(response.headers))
-    return response
+# Assign request IDs and log requests; header dumps are only built at DEBUG
+app.add_middleware(RequestLoggingMiddleware)
 
 
 # Include routers
-logger.debug("Including routers: chat, auth")
+logger.debug("Including routers: chat, auth, ops")
 app.include_router(chat.router, prefix="/api", tags=["chat"])
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
-
-
-@app.on_event("startup")
-async def startup_event():
-    logger.debug("Application startup")
-    logger.debug("CORS origins: %s", CORS_ORIGINS)
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.debug("Application shutdown")
+app.include_router(ops.router, prefix="/ops", tags=["ops"])
 
 
 if __name__ == "__main__":
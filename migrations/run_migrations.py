@@ -47,9 +47,10 @@ def main():
     wait_for_postgres()
     run_migrations()
     
-    # Start the application
+    # Start the application: the container CMD, or the production server
     print("Starting the application...")
-    os.execvp("uvicorn", ["uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8005", "--reload"])
+    command = sys.argv[1:] or [sys.executable, "-m", "app.server"]
+    os.execvp(command[0], command)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""index blacklisted_tokens.expires_at
+
+Revision ID: blacklist_expires_index
+Revises: geocode_cache
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'blacklist_expires_index'
+down_revision = 'geocode_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently so logouts aren't blocked while a large table is indexed
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_blacklisted_tokens_expires_at'),
+            'blacklisted_tokens',
+            ['expires_at'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_blacklisted_tokens_expires_at'),
+            table_name='blacklisted_tokens',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,31 @@
+"""create geocode_cache table
+
+Revision ID: geocode_cache
+Revises: blacklist_tokens
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'geocode_cache'
+down_revision = 'blacklist_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'geocode_cache',
+        sa.Column('location', sa.String(), nullable=False),
+        sa.Column('lat', sa.Float(), nullable=False),
+        sa.Column('lon', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('location')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('geocode_cache')
@@ -0,0 +1,51 @@
+"""revoke tokens by jti digest and per-user token version
+
+Revision ID: token_versions
+Revises: blacklist_expires_index
+Create Date: 2026-10-18 00:00:00.000000
+
+Existing blacklist rows are rekeyed with the sha256 of the whole token, which is
+the key tokens issued without a ``jti`` are still checked by, so every
+revocation stays in force. Tokens issued before this revision carry no
+``token_version`` and count as version 0.
+
+Downgrading can't turn digests back into tokens, so it empties the blacklist;
+tokens revoked in the last ACCESS_TOKEN_EXPIRE_MINUTES become valid again.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'token_versions'
+down_revision = 'blacklist_expires_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), nullable=False, server_default='0')
+    )
+
+    # Expired rows protect nothing; don't spend the backfill on them
+    op.execute("DELETE FROM blacklisted_tokens WHERE expires_at < now()")
+    op.add_column('blacklisted_tokens', sa.Column('jti_digest', sa.LargeBinary(length=32), nullable=True))
+    op.execute("UPDATE blacklisted_tokens SET jti_digest = sha256(convert_to(token, 'UTF8'))")
+    op.alter_column('blacklisted_tokens', 'jti_digest', nullable=False)
+    op.create_index(op.f('ix_blacklisted_tokens_jti_digest'), 'blacklisted_tokens', ['jti_digest'], unique=True)
+
+    op.drop_index(op.f('ix_blacklisted_tokens_token'), table_name='blacklisted_tokens')
+    op.drop_column('blacklisted_tokens', 'token')
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM blacklisted_tokens")
+    op.add_column('blacklisted_tokens', sa.Column('token', sa.String(), nullable=False))
+    op.create_index(op.f('ix_blacklisted_tokens_token'), 'blacklisted_tokens', ['token'], unique=True)
+
+    op.drop_index(op.f('ix_blacklisted_tokens_jti_digest'), table_name='blacklisted_tokens')
+    op.drop_column('blacklisted_tokens', 'jti_digest')
+
+    op.drop_column('users', 'token_version')
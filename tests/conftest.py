@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before anything imports its settings
+_db_path = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_path}")
+os.environ.setdefault("ASYNC_DATABASE_URL", f"sqlite+aiosqlite:///{_db_path}")
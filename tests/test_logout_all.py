@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.config.database import AsyncSessionLocal, Base, async_engine, engine
+from app.models import token, user  # noqa: F401  (register the tables)
+from app.models.user import User
+from app.services.principal_cache import Principal, PrincipalCache, principal_cache
+from app.utils.auth import create_access_token, get_current_user, revoke_user_tokens
+
+
+@pytest.fixture(scope="module", autouse=True)
+def tables():
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+
+
+def _request(access_token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {access_token}".encode())]})
+
+
+async def _authenticate(access_token: str) -> Principal:
+    async with AsyncSessionLocal() as db:
+        return await get_current_user(_request(access_token), None, db)
+
+
+async def _create_user(name: str) -> User:
+    async with AsyncSessionLocal() as db:
+        db_user = User(username=name, email=f"{name}@example.com", hashed_password="x")
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
+
+def _token(db_user: User, **claims) -> str:
+    return create_access_token(data={"sub": db_user.email, **claims})
+
+
+def test_logout_all_revokes_every_earlier_token():
+    async def scenario():
+        db_user = await _create_user("amy")
+        cached = _token(db_user, token_version=0)
+        uncached = _token(db_user, token_version=0)
+        legacy = _token(db_user)  # issued before tokens carried a version
+
+        assert (await _authenticate(cached)).id == db_user.id
+        assert principal_cache.get(cached) is not None
+
+        async with AsyncSessionLocal() as db:
+            await revoke_user_tokens(db_user.id, db)
+
+        for access_token in (cached, uncached, legacy):
+            with pytest.raises(HTTPException) as exc_info:
+                await _authenticate(access_token)
+            assert exc_info.value.status_code == 401
+
+        fresh = _token(db_user, token_version=1)
+        assert (await _authenticate(fresh)).id == db_user.id
+
+    async def run():
+        try:
+            await scenario()
+        finally:
+            # Pooled aiosqlite connections would outlive this event loop
+            await async_engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_principal_loaded_before_invalidation_is_not_cached():
+    cache = PrincipalCache()
+    principal = Principal(id=7, username="bob", email="bob@example.com", is_active=True)
+
+    snapshot = cache.snapshot()
+    # logout-all commits and invalidates while the user lookup is in flight
+    cache.invalidate_user_local(principal.id)
+    cache.put("token", principal, b"key", None, snapshot)
+    assert cache.get("token") is None
+
+    cache.put("token", principal, b"key", None, cache.snapshot())
+    assert cache.get("token") == (principal, b"key")
+
+
+def test_other_users_invalidation_does_not_block_caching():
+    cache = PrincipalCache()
+    principal = Principal(id=7, username="bob", email="bob@example.com", is_active=True)
+
+    snapshot = cache.snapshot()
+    cache.invalidate_user_local(8)
+    cache.put("token", principal, b"key", None, snapshot)
+    assert cache.get("token") == (principal, b"key")
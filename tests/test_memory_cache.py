@@ -0,0 +1,50 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.services import memory_cache
+from app.services.memory_cache import InProcessMemorySearchCache, RedisMemorySearchCache
+
+
+@pytest.fixture
+def redis_cache(monkeypatch):
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(memory_cache, "get_redis", lambda: client)
+    return RedisMemorySearchCache(ttl=60)
+
+
+@pytest.fixture
+def in_process_cache():
+    return InProcessMemorySearchCache(ttl=60)
+
+
+async def _search_racing_invalidation(cache) -> None:
+    # search starts -> a memory write invalidates -> the search's results are stored
+    generation = await cache.generation(1)
+    await cache.invalidate(1)
+    await cache.set(1, "where do I live", 5, [{"memory": "Lives in Berlin"}], generation)
+
+
+@pytest.mark.parametrize("cache_factory", ["redis_cache", "in_process_cache"])
+def test_search_that_raced_an_invalidation_is_not_cached(cache_factory, request):
+    cache = request.getfixturevalue(cache_factory)
+
+    async def scenario():
+        await _search_racing_invalidation(cache)
+        assert await cache.get(1, "where do I live", 5) is None
+
+        results = [{"memory": "Lives in Lisbon"}]
+        await cache.set(1, "where do I live", 5, results, await cache.generation(1))
+        assert await cache.get(1, "Where do I live?", 5) == results
+
+    asyncio.run(scenario())
+
+
+def test_redis_invalidation_drops_cached_searches(redis_cache):
+    async def scenario():
+        await redis_cache.set(1, "q", 5, [{"memory": "m"}], await redis_cache.generation(1))
+        await redis_cache.invalidate(1)
+        assert await redis_cache.get(1, "q", 5) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,22 @@
+from passlib.hash import bcrypt
+
+from app.config.settings import BCRYPT_ROUNDS
+from app.utils.passwords import verify_and_update_password
+
+
+def test_hash_below_current_cost_is_rehashed_on_login():
+    # As left behind by raising BCRYPT_ROUNDS by one
+    stale_hash = bcrypt.using(rounds=BCRYPT_ROUNDS - 1).hash("correct horse")
+
+    verified, new_hash = verify_and_update_password("correct horse", stale_hash)
+
+    assert verified
+    assert new_hash is not None
+    assert bcrypt.from_string(new_hash).rounds == BCRYPT_ROUNDS
+    assert verify_and_update_password("correct horse", new_hash) == (True, None)
+
+
+def test_wrong_password_is_not_rehashed():
+    stale_hash = bcrypt.using(rounds=4).hash("correct horse")
+
+    assert verify_and_update_password("battery staple", stale_hash) == (False, None)